@@ -1,7 +1,8 @@
 import os
 import sys
 from subprocess import Popen
-from Xlib import display, X
+from Xlib import X
+from core.xconn import DPY as dpy, ROOT as root, set_cloexec
 
 # =======================
 # Quit WM
@@ -9,8 +10,6 @@ from Xlib import display, X
 def quit_wm():
     """Encerra o Window Manager com segurança"""
     try:
-        dpy = display.Display()
-        root = dpy.screen().root
         # Remove eventos do root
         root.change_attributes(event_mask=0)
         dpy.flush()
@@ -28,8 +27,6 @@ def restart_wm(wm_state=None):
     Se wm_state estiver disponível, fecha todas as janelas gerenciadas.
     """
     try:
-        dpy = display.Display()
-        root = dpy.screen().root
         root.change_attributes(event_mask=0)
         dpy.flush()
     except Exception:
@@ -37,9 +34,14 @@ def restart_wm(wm_state=None):
 
     print("Reiniciando Window Manager...")
 
-    # Obter o caminho do script atual
-    python = sys.executable
-    script = sys.argv[0]
+    # O novo processo abre sua própria conexão: não herda o socket antigo
+    try:
+        set_cloexec()
+    except Exception:
+        pass
 
-    # Reinicia o processo atual
-    os.execv(python, [python] + sys.argv)
+    # Reinicia o processo atual com argv/env explícitos (-O: sem asserts)
+    python = sys.executable
+    env = dict(os.environ, PYTHONOPTIMIZE="1")
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    os.execve(python, [python] + sys.argv, env)
@@ -1,17 +1,49 @@
-from Xlib import X, display
-from managers.window import Window
-from utils.monitor import get_monitors
+import time
+from Xlib import X
+from Xlib.ext import randr
+from managers.window import Window, flush_pending
+from core import xconn
+from core.xconn import DPY as dpy, ROOT as root
 from utils.config import get_config
+from utils import xtrap
 from core import keybindings
 
 cfg = get_config()
-dpy = display.Display()
-root = dpy.screen().root
 root.change_attributes(event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask)
 
-# Armazenar janelas gerenciadas e monitores
+# Armazenar janelas gerenciadas e o workspace de cada uma (xid -> ...)
 managed_windows = {}
-monitors = get_monitors()
+_window_ws = {}
+
+# =======================
+# ConfigureRequest comprimido: só a última geometria de cada janela
+# é aplicada, no máximo a cada CONFIGURE_INTERVAL segundos (50 Hz)
+# =======================
+CONFIGURE_INTERVAL = 0.02
+_dirty_windows = set()
+_last_configure = 0.0
+
+def configure_timeout():
+    """Segundos até o próximo lote de configures (None se não há pendentes)"""
+    if not _dirty_windows:
+        return None
+    return max(0.0, _last_configure + CONFIGURE_INTERVAL - time.monotonic())
+
+def apply_pending_configures(force=False):
+    """Aplica as geometrias pendentes se o intervalo já passou (ou se force)"""
+    global _last_configure
+    if not _dirty_windows:
+        return
+    now = time.monotonic()
+    if not force and now - _last_configure < CONFIGURE_INTERVAL:
+        return
+    for win in _dirty_windows:
+        geom = win._pending_geom
+        win._pending_geom = None
+        if geom:
+            win.request_configure(*geom)
+    _dirty_windows.clear()
+    _last_configure = now
 
 def setup_wm():
     """Configura o WM e captura eventos"""
@@ -22,75 +54,132 @@ def setup_wm():
                            X.ButtonPressMask |
                            X.ButtonReleaseMask |
                            X.PointerMotionMask)
+    xconn.set_cloexec()
+    xtrap.install(dpy)
+    # Monitores ficam em cache até o RandR avisar de uma mudança de tela
+    if dpy.has_extension("RANDR"):
+        randr.select_input(root, randr.RRScreenChangeNotifyMask)
+        _HANDLERS[dpy.extension_event.ScreenChangeNotify] = handle_screen_change
+    keybindings.grab_keys()
     dpy.flush()
 
 def next_event():
     """Retorna o próximo evento do X"""
     return dpy.next_event()
 
-def handle_event(ev, wm_state):
-    """Distribui eventos para funções apropriadas"""
-    # MapRequest: nova janela
-    if ev.type == X.MapRequest:
-        win = Window(ev.window)
-        managed_windows[ev.window.id] = win
-        # Adiciona a janela ao workspace atual
-        ws = wm_state["workspaces"][wm_state["current"]]
-        ws.add_window(win)
-
-    # ConfigureRequest: redimensionamento via X
-    elif ev.type == X.ConfigureRequest:
-        win = managed_windows.get(ev.window.id)
-        if win:
-            win.configure(
-                x=ev.x,
-                y=ev.y,
-                width=ev.width,
-                height=ev.height
-            )
-
-    # DestroyNotify: janela fechada
-    elif ev.type == X.DestroyNotify:
-        win = managed_windows.pop(ev.window.id, None)
-        if win:
-            for ws in wm_state["workspaces"].values():
-                ws.remove_window(win)
-
-    # UnmapNotify: janela minimizada
-    elif ev.type == X.UnmapNotify:
-        win = managed_windows.get(ev.window.id)
-        if win:
-            for ws in wm_state["workspaces"].values():
-                ws.remove_window(win)
-
-    # PropertyNotify: título ou ícone mudaram
-    elif ev.type == X.PropertyNotify:
-        win = managed_windows.get(ev.window.id)
-        if win:
-            # Placeholder: atualizar Lemonbar
-            pass
-
-    # FocusIn/FocusOut: atualizar bordas
-    elif ev.type == X.FocusIn:
-        win = managed_windows.get(ev.window.id)
-        if win:
-            win.set_focus(True)
-    elif ev.type == X.FocusOut:
-        win = managed_windows.get(ev.window.id)
-        if win:
-            win.set_focus(False)
-
-    # ButtonPress + MotionNotify: suporte para mover/redimensionar janelas com mouse
-    elif ev.type == X.ButtonPress:
-        win = managed_windows.get(ev.child.id) if ev.child else None
-        if win and win.is_floating():
-            # Placeholder: iniciar drag ou resize
-            pass
-    elif ev.type == X.MotionNotify:
-        # Placeholder: atualizar posição/redimensionamento durante drag
-        pass
-
-    # Teclado
-    elif ev.type == X.KeyPress:
-        key = ev.detail  # número da tecla, converter para string se necessário
-        keybindings.handle_key(key, wm_state)
+def handle_event(ev, wm_state, dirty_workspaces=None):
+    """
+    Distribui o evento para o handler apropriado.
+    Workspaces alterados são anotados em dirty_workspaces; sem um conjunto
+    externo, o layout é aplicado e as requisições enviadas imediatamente.
+    """
+    if dirty_workspaces is not None:
+        _dispatch(ev, wm_state, dirty_workspaces)
+        return
+    dirty = set()
+    try:
+        _dispatch(ev, wm_state, dirty)
+        for ws in dirty:
+            if ws._layout_dirty:
+                ws.apply_layout()
+        # Sem loop com temporizador: aplica na hora
+        apply_pending_configures(force=True)
+    finally:
+        flush_pending(dpy)
+
+def _dispatch(ev, wm_state, dirty):
+    _HANDLERS.get(ev.type, _noop)(ev, wm_state, dirty)
+
+# =======================
+# Handlers (ev, wm_state, dirty)
+# =======================
+def _noop(ev, wm_state, dirty):
+    pass
+
+def handle_map_request(ev, wm_state, dirty):
+    """Nova janela"""
+    win = Window(ev.window)
+    win.adopt()
+    managed_windows[ev.window.id] = win
+    # Adiciona a janela ao workspace atual
+    ws = wm_state["workspaces"][wm_state["current"]]
+    ws.add_window(win)
+    _window_ws[ev.window.id] = ws
+    dirty.add(ws)
+
+def handle_configure_request(ev, wm_state, dirty):
+    """Redimensionamento via X"""
+    win = managed_windows.get(ev.window.id)
+    if win:
+        # Guarda só o pedido mais recente; aplicado em apply_pending_configures
+        win._pending_geom = (ev.x, ev.y, ev.width, ev.height)
+        _dirty_windows.add(win)
+    else:
+        # Janela ainda não gerenciada: repassa o pedido sem criar um Window
+        ev.window.configure(x=ev.x, y=ev.y, width=ev.width, height=ev.height)
+
+def handle_destroy_notify(ev, wm_state, dirty):
+    """Janela fechada"""
+    win = managed_windows.pop(ev.window.id, None)
+    ws = _window_ws.pop(ev.window.id, None)
+    _dirty_windows.discard(win)
+    if win and ws and ws.remove_window(win):
+        dirty.add(ws)
+
+def handle_configure_notify(ev, wm_state, dirty):
+    """Janela mudou de lugar: atualiza a geometria em cache e descarta o monitor"""
+    win = managed_windows.get(ev.window.id)
+    if win:
+        win.x, win.y, win.width, win.height = ev.x, ev.y, ev.width, ev.height
+        win.border_width = ev.border_width
+        win._monitor = None
+
+def handle_unmap_notify(ev, wm_state, dirty):
+    """Janela minimizada"""
+    win = managed_windows.get(ev.window.id)
+    if win:
+        win._mapped = False  # o cliente pode se desmapear sozinho
+    ws = _window_ws.get(ev.window.id)
+    if win and ws and ws.remove_window(win):
+        dirty.add(ws)
+
+def handle_focus_in(ev, wm_state, dirty):
+    win = managed_windows.get(ev.window.id)
+    if win:
+        win.set_focus(True)
+
+def handle_focus_out(ev, wm_state, dirty):
+    win = managed_windows.get(ev.window.id)
+    if win:
+        win.set_focus(False)
+
+def handle_screen_change(ev, wm_state, dirty):
+    """Monitores mudaram (RandR): descarta o cache"""
+    xconn.invalidate_monitors()
+
+def handle_mapping_notify(ev, wm_state, dirty):
+    """Mudança de layout do teclado: só então a tabela é refeita"""
+    dpy.refresh_keyboard_mapping(ev)
+    if ev.request == X.MappingKeyboard:
+        keybindings.reload_keys()
+
+def handle_key_press(ev, wm_state, dirty=None):
+    """Atalho procurado direto por (keycode, modificadores), sem montar strings"""
+    keybindings.handle_key((ev.detail, ev.state & keybindings.MOD_MASK), wm_state)
+
+# =======================
+# Tabela de despacho por tipo de evento, montada uma vez no import.
+# PropertyNotify, ButtonPress e MotionNotify ainda não têm tratamento
+# (atualizar Lemonbar / drag com o mouse) e caem no _noop.
+# =======================
+_HANDLERS = {
+    X.MapRequest: handle_map_request,
+    X.ConfigureRequest: handle_configure_request,
+    X.DestroyNotify: handle_destroy_notify,
+    X.ConfigureNotify: handle_configure_notify,
+    X.UnmapNotify: handle_unmap_notify,
+    X.FocusIn: handle_focus_in,
+    X.FocusOut: handle_focus_out,
+    X.KeyPress: handle_key_press,
+    X.MappingNotify: handle_mapping_notify,
+}
@@ -1,81 +1,151 @@
+import shlex
+from Xlib import X, XK
 from utils import launcher, lemonbar
 from core import commands
+from core.xconn import DPY as dpy, ROOT as root
 from utils.config import get_config, reload_config
-from subprocess import Popen
 
 cfg = get_config()
 
+# =======================
+# Tabela de atalhos: (keycode, máscara) -> handler(wm_state)
+# Reconstruída apenas ao carregar/recarregar a config
+# =======================
+_KEY_TABLE = {}
+
+_MODS = {"Super": X.Mod4Mask, "Ctrl": X.ControlMask, "Alt": X.Mod1Mask, "Shift": X.ShiftMask}
+MOD_MASK = X.Mod4Mask | X.ControlMask | X.Mod1Mask | X.ShiftMask
+
+# NumLock (Mod2) e CapsLock (Lock) não mudam o atalho
+_LOCK_VARIANTS = (0, X.LockMask, X.Mod2Mask, X.LockMask | X.Mod2Mask)
+
+def _parse_key(spec):
+    """Traduz "Super+Shift+q" para (keycode, máscara) uma única vez"""
+    if not spec:
+        return None
+    *mods, name = spec.split("+")
+    mask = 0
+    for m in mods:
+        mask |= _MODS.get(m, 0)
+    keysym = XK.string_to_keysym(name)
+    if not keysym and len(name) == 1:
+        keysym = ord(name)  # ex: "`", keysyms latin1 coincidem com o código
+    keycode = dpy.keysym_to_keycode(keysym) if keysym else 0
+    if not keycode:
+        print(f"Atalho inválido no config: {spec}")
+        return None
+    return (keycode, mask)
+
 def handle_key(key, wm_state):
+    fn = _KEY_TABLE.get(key)
+    if fn:
+        fn(wm_state)
+
+# =======================
+# Handlers
+# =======================
+def _focused(wm_state):
     ws = wm_state["workspaces"][wm_state["current"]]
-    w = ws.get_focused_window()
+    return ws.get_focused_window()
+
+def _on_focused(action):
+    """Envolve uma ação que só faz sentido com uma janela focada"""
+    def handler(wm_state):
+        w = _focused(wm_state)
+        if w:
+            action(w)
+    return handler
+
+def _snap(corner):
+    return _on_focused(lambda w: w.snap_to_corner(corner, get_monitor_for_window(w)))
 
-    # =======================
-    # Launcher
-    # =======================
-    if key == cfg.get_key("launch_launcher"):
-        launcher.open(cfg)
+def _reload(wm_state):
+    reload_config()
+    lemonbar.reload()
+    reload_keys()
 
-    # =======================
-    # Lemonbar toggle
-    # =======================
-    elif key == cfg.get_key("toggle_lemonbar"):
-        lemonbar.toggle()
+def reload_keys():
+    """Refaz a tabela (keycodes podem ter mudado) e os grabs no root"""
+    _rebuild_key_table()
+    grab_keys()
+
+def grab_keys():
+    """Captura só as combinações configuradas (com variantes de NumLock/CapsLock)"""
+    root.ungrab_key(X.AnyKey, X.AnyModifier)
+    for keycode, mask in _KEY_TABLE:
+        for lock in _LOCK_VARIANTS:
+            root.grab_key(keycode, mask | lock, True, X.GrabModeAsync, X.GrabModeAsync)
+
+def _rebuild_key_table():
+    """Percorre a config uma única vez e monta a tabela de atalhos"""
+    _KEY_TABLE.clear()
+
+    def bind(name, handler):
+        key = _parse_key(cfg.get_key(name))
+        if key:
+            _KEY_TABLE[key] = handler
+
+    # Launcher / Lemonbar
+    bind("launch_launcher", lambda s: launcher.submit(launcher.open, cfg))
+    bind("toggle_lemonbar", lambda s: lemonbar.toggle())
 
-    # =======================
     # Quit / Restart / Reload
-    # =======================
-    elif key == cfg.get_key("quit_wm"):
-        commands.quit_wm()
-    elif key == cfg.get_key("restart_wm"):
-        commands.restart_wm(wm_state)
-    elif key == cfg.get_key("reload_config"):
-        reload_config()
-        lemonbar.reload()
-
-    # =======================
+    bind("quit_wm", lambda s: commands.quit_wm())
+    bind("restart_wm", lambda s: commands.restart_wm(s))
+    bind("reload_config", _reload)
+
     # Alt+Tab circular
-    # =======================
-    elif key == cfg.get_key("next_window"):
-        ws.focus_next()
-    elif key == cfg.get_key("prev_window"):
-        ws.focus_prev()
-
-    # =======================
-    # Janelas focadas
-    # =======================
-    elif w:
-        # Movimento via teclado
-        if key == cfg.get_key("move_up"): w.move(dy=-20)
-        elif key == cfg.get_key("move_down"): w.move(dy=20)
-        elif key == cfg.get_key("move_left"): w.move(dx=-20)
-        elif key == cfg.get_key("move_right"): w.move(dx=20)
-        # Redimensionamento via teclado
-        elif key == cfg.get_key("resize_increase_width"): w.resize(dw=20)
-        elif key == cfg.get_key("resize_decrease_width"): w.resize(dw=-20)
-        elif key == cfg.get_key("resize_increase_height"): w.resize(dh=20)
-        elif key == cfg.get_key("resize_decrease_height"): w.resize(dh=-20)
-        # Snap nos cantos
-        elif key == cfg.get_key("snap_top_left"): w.snap_to_corner("top_left", get_monitor_for_window(w))
-        elif key == cfg.get_key("snap_top_right"): w.snap_to_corner("top_right", get_monitor_for_window(w))
-        elif key == cfg.get_key("snap_bottom_left"): w.snap_to_corner("bottom_left", get_monitor_for_window(w))
-        elif key == cfg.get_key("snap_bottom_right"): w.snap_to_corner("bottom_right", get_monitor_for_window(w))
-        # Floating toggle
-        elif key == cfg.get_key("toggle_floating"): w.toggle_floating()
-        # Scratchpad
-        elif key == cfg.get_scratchpad_shortcut():
-            cmd = cfg.get_scratchpad_command()
-            if cmd: Popen(cmd, shell=True)
+    bind("next_window", lambda s: s["workspaces"][s["current"]].focus_next())
+    bind("prev_window", lambda s: s["workspaces"][s["current"]].focus_prev())
+
+    # Movimento via teclado
+    bind("move_up", _on_focused(lambda w: w.move(dy=-20)))
+    bind("move_down", _on_focused(lambda w: w.move(dy=20)))
+    bind("move_left", _on_focused(lambda w: w.move(dx=-20)))
+    bind("move_right", _on_focused(lambda w: w.move(dx=20)))
+
+    # Redimensionamento via teclado
+    bind("resize_increase_width", _on_focused(lambda w: w.resize(dw=20)))
+    bind("resize_decrease_width", _on_focused(lambda w: w.resize(dw=-20)))
+    bind("resize_increase_height", _on_focused(lambda w: w.resize(dh=20)))
+    bind("resize_decrease_height", _on_focused(lambda w: w.resize(dh=-20)))
+
+    # Snap nos cantos
+    for corner in ("top_left", "top_right", "bottom_left", "bottom_right"):
+        bind("snap_" + corner, _snap(corner))
+
+    # Floating toggle
+    bind("toggle_floating", _on_focused(lambda w: w.toggle_floating()))
+
+    # Scratchpad: argv pré-tokenizado, sem /bin/sh (pipes, && e $VAR não são interpretados)
+    shortcut = _parse_key(cfg.get_scratchpad_shortcut())
+    try:
+        argv = tuple(shlex.split(cfg.get_scratchpad_command()))
+    except ValueError as e:
+        print(f"Comando de scratchpad inválido no config ({e}); atalho ignorado")
+        argv = ()
+    if shortcut and argv:
+        _KEY_TABLE[shortcut] = _on_focused(lambda w: launcher.submit(launcher.spawn, argv))
 
 # =======================
 # Helpers
 # =======================
-from utils.monitor import get_monitors
+from core.xconn import monitors
 
 def get_monitor_for_window(win):
-    """Retorna o monitor onde a janela está localizada"""
-    geom = win.win.get_geometry()
-    for mon in get_monitors():
-        if mon.x <= geom.x < mon.x + mon.width and mon.y <= geom.y < mon.y + mon.height:
-            return mon
+    """
+    Retorna o monitor onde a janela está localizada.
+    O resultado fica em cache na janela até um ConfigureNotify dela
+    ou até a lista de monitores mudar.
+    """
+    mons = monitors()
+    cached = win._monitor
+    if cached and cached[0] is mons:
+        return cached[1]
+    gx, gy = win.x, win.y
     # fallback para primeiro monitor
-    return get_monitors()[0]
+    mon = next((m for m in mons if m.x <= gx < m.x + m.width and m.y <= gy < m.y + m.height), mons[0])
+    win._monitor = (mons, mon)
+    return mon
+
+_rebuild_key_table()
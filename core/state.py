@@ -1,13 +1,51 @@
-import pickle, os
+import json, os
 
-STATE_FILE = "/tmp/mywm_state.pkl"
+STATE_FILE = "/tmp/mywm_state.json"
 
 def save_state(state):
-    with open(STATE_FILE, "wb") as f:
-        pickle.dump(state, f)
+    """
+    Salva apenas dados simples (ids de workspace, layout, xids e xid focado).
+    Escreve num arquivo temporário e renomeia, para nunca deixar um estado pela metade.
+    """
+    data = {
+        "current": state.get("current", 1),
+        "workspaces": {
+            str(ws_id): {
+                "layout": ws.layout_name,
+                "windows": list(ws.windows),
+                "focus": ws.focus_key,
+            }
+            for ws_id, ws in state.get("workspaces", {}).items()
+        },
+    }
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, STATE_FILE)
 
 def load_state():
-    if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, "rb") as f:
-            return pickle.load(f)
-    return None
+    """Reconstrói os workspaces a partir do estado salvo (ou None se não houver)"""
+    if not os.path.exists(STATE_FILE):
+        return None
+    try:
+        with open(STATE_FILE, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    from core.xconn import DPY
+    from managers.window import Window
+    from managers.workspace import Workspace
+
+    workspaces = {}
+    for ws_id, info in data.get("workspaces", {}).items():
+        ws = Workspace(int(ws_id), layout=info.get("layout", "tiling"))
+        for xid in info.get("windows", []):
+            ws.add_window(Window(DPY.create_resource_object("window", xid)))
+        if info.get("focus") in ws.windows:
+            ws.focus_key = info["focus"]
+            ws.update_focus()
+        workspaces[int(ws_id)] = ws
+    return {"workspaces": workspaces, "current": data.get("current", 1)}
@@ -1,9 +1,26 @@
+import os
+import selectors
 from core import events
+from core.xconn import DPY as dpy
 from managers.workspace import Workspace
 from utils.config import get_config
 
 cfg = get_config()
 
+# Máximo de eventos processados por despertar do loop
+MAX_BATCH = 64
+
+# Backends de multiplexação disponíveis; MYWM_SELECTOR escolhe um (padrão: o melhor do SO)
+_SELECTORS = {
+    "epoll": getattr(selectors, "EpollSelector", None),
+    "poll": getattr(selectors, "PollSelector", None),
+    "select": selectors.SelectSelector,
+}
+
+def make_selector(backend=None):
+    cls = _SELECTORS.get(backend or os.environ.get("MYWM_SELECTOR", "")) or selectors.DefaultSelector
+    return cls()
+
 def main():
     events.setup_wm()
 
@@ -18,10 +35,30 @@ def main():
 
     print("WM iniciado. Hotkeys configuradas via config.toml")
 
+    # Um único multiplexador para o socket do X (e futuros fds de IPC)
+    sel = make_selector()
+    sel.register(dpy.fileno(), selectors.EVENT_READ)
+
     while True:
-        ev = events.next_event()
-        from core import keybindings
-        keybindings.handle_key(ev, wm_state)
+        # Só dorme quando o Xlib não tem nada em buffer;
+        # com configures pendentes, acorda a tempo do próximo tick de 20 ms
+        if not dpy.pending_events():
+            sel.select(events.configure_timeout())
+        n = min(dpy.pending_events(), MAX_BATCH)
+        batch = [dpy.next_event() for _ in range(n)]
+
+        # Layouts são reaplicados uma única vez por workspace alterado
+        dirty_workspaces = set()
+        try:
+            for ev in batch:
+                events.handle_event(ev, wm_state, dirty_workspaces)
+            for ws in dirty_workspaces:
+                if ws._layout_dirty:
+                    ws.apply_layout()
+            events.apply_pending_configures()
+        finally:
+            # Único ponto de flush do lote
+            dpy.flush()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,50 @@
+import fcntl
+from Xlib import display
+from managers.monitor import get_monitors
+
+# =======================
+# Conexão única com o servidor X, compartilhada por todo o WM
+# =======================
+DPY = display.Display()
+ROOT = DPY.screen().root
+
+def set_cloexec():
+    """Marca o socket do X como FD_CLOEXEC: processos filhos e execs não o herdam"""
+    fd = DPY.fileno()
+    flags = fcntl.fcntl(fd, fcntl.F_GETFD)
+    fcntl.fcntl(fd, fcntl.F_SETFD, flags | fcntl.FD_CLOEXEC)
+
+# =======================
+# Monitores (memoizados até uma mudança de tela)
+# =======================
+_monitors = None
+
+# Retângulos de snap por monitor: SNAP[nome][canto] = (x, y, w, h)
+SNAP = {}
+
+# Canto -> (sx, sy): 0 encosta à esquerda/topo, 1 à direita/base
+_CORNERS = {"top_left": (0, 0), "top_right": (1, 0), "bottom_left": (0, 1), "bottom_right": (1, 1)}
+
+def snap_rects(m):
+    """Retângulos de meia tela de cada canto do monitor m"""
+    w = m.width // 2
+    h = m.height // 2
+    return {
+        corner: (m.x + sx * (m.width - w), m.y + sy * (m.height - h), w, h)
+        for corner, (sx, sy) in _CORNERS.items()
+    }
+
+def monitors():
+    """Retorna a tupla de monitores, consultando o RandR só na primeira vez"""
+    global _monitors
+    if _monitors is None:
+        _monitors = tuple(get_monitors(DPY))
+        SNAP.clear()
+        for m in _monitors:
+            SNAP[m.name] = snap_rects(m)
+    return _monitors
+
+def invalidate_monitors():
+    """Descarta o cache; a próxima chamada a monitors() consulta o RandR"""
+    global _monitors
+    _monitors = None
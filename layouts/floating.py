@@ -1,4 +1,4 @@
 class FloatingLayout:
-    def apply(self, windows):
+    def apply(self, windows, mon=None):
         for w in windows:
             w.map()
@@ -1,5 +1,5 @@
 class FullscreenLayout:
-    def apply(self, windows):
+    def apply(self, windows, mon):
         if windows:
             for w in windows:
-                w.configure(x=0, y=0, width=800, height=600)
+                w.configure(mon.x, mon.y, mon.width, mon.height)
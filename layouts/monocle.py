@@ -1,8 +1,8 @@
 class MonocleLayout:
-    def apply(self, windows):
+    def apply(self, windows, mon):
         if windows:
             for i, w in enumerate(windows):
                 if i == 0:
-                    w.configure(x=0, y=0, width=800, height=600)
+                    w.configure(mon.x, mon.y, mon.width, mon.height)
                 else:
                     w.configure(width=1, height=1)  # minimize as outras
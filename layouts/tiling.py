@@ -1,12 +1,15 @@
+import functools
+
+@functools.lru_cache(maxsize=64)
+def _tile_rects(x, y, width, height, n):
+    """Retângulos (x, y, w, h) das n janelas empilhadas, calculados uma vez por tela/quantidade"""
+    h = height // n
+    return tuple((x, y + i * h, width, h) for i in range(n))
+
 class TilingLayout:
-    def apply(self, windows):
+    def apply(self, windows, mon):
         if not windows:
             return
-        total = len(windows)
-        screen_width = 800
-        screen_height = 600
-        height_per = screen_height // total
-        y = 0
-        for w in windows:
-            w.configure(x=0, y=y, width=screen_width, height=height_per)
-            y += height_per
+        rects = _tile_rects(mon.x, mon.y, mon.width, mon.height, len(windows))
+        for w, r in zip(windows, rects):
+            w.configure(*r)
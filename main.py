@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from Xlib import X, Xatom, display
+from Xlib import X, Xatom
+from Xlib.protocol import request
+from core import xconn
+from core.xconn import DPY as dpy, ROOT as root  # display e root compartilhados
 from core.events import setup_wm, next_event, handle_event
 from core.keybindings import handle_key
 from managers.window import Window
@@ -10,25 +13,28 @@ from utils import lemonbar
 import subprocess
 import threading
 
-# =======================
-# Display e root
-# =======================
-dpy = display.Display()
-root = dpy.screen().root
-
 # =======================
 # Nome do WM
 # =======================
-wm_name_atom = dpy.intern_atom("_NET_WM_NAME")
-utf8_atom = dpy.intern_atom("UTF8_STRING")
-root.change_property(wm_name_atom, utf8_atom, 8, "MyWM".encode())
-
-# _NET_SUPPORTING_WM_CHECK
-wm_check = root.create_window(0, 0, 1, 1, 0, X.CopyFromParent)
-net_wm_check = dpy.intern_atom("_NET_SUPPORTING_WM_CHECK")
-wm_check.change_property(net_wm_check, Xatom.WINDOW, 32, [wm_check.id])
-wm_check.change_property(wm_name_atom, utf8_atom, 8, "MyWM".encode())
-dpy.flush()
+wm_check = None
+
+def _init_ewmh():
+    """Anuncia o nome do WM e cria a janela _NET_SUPPORTING_WM_CHECK (só ao iniciar, não no import)"""
+    global wm_check
+    # Os três InternAtom vão juntos: um round trip só
+    reqs = [request.InternAtom(display=dpy.display, name=n, only_if_exists=0, defer=True)
+            for n in ("_NET_WM_NAME", "UTF8_STRING", "_NET_SUPPORTING_WM_CHECK")]
+    for r in reqs:
+        r.reply()
+    wm_name_atom, utf8_atom, net_wm_check = (r.atom for r in reqs)
+
+    root.change_property(wm_name_atom, utf8_atom, 8, "MyWM".encode())
+
+    # _NET_SUPPORTING_WM_CHECK
+    wm_check = root.create_window(0, 0, 1, 1, 0, X.CopyFromParent)
+    wm_check.change_property(net_wm_check, Xatom.WINDOW, 32, [wm_check.id])
+    wm_check.change_property(wm_name_atom, utf8_atom, 8, "MyWM".encode())
+    root.change_property(net_wm_check, Xatom.WINDOW, 32, [wm_check.id])
 
 # =======================
 # Inicialização
@@ -44,6 +50,9 @@ def main():
     for app in get_autostart_apps():
         subprocess.Popen(app, shell=True)
 
+    # Propriedades EWMH do WM (setup_wm faz o flush)
+    _init_ewmh()
+
     # Setup do WM e captura de eventos
     setup_wm()
 
@@ -65,42 +74,66 @@ class Workspace:
     """Representa um workspace com layout e janelas"""
     def __init__(self, id):
         self.id = id
-        self.windows = []
+        # janela -> None: dict na ordem de inserção (ordem dos tiles), remoção O(1)
+        self.windows = {}
         self.layout = None
-        self.focus_idx = 0
+        self._focus = None  # janela focada; o índice só é calculado ao ciclar o foco
+        self._focused_win = None  # janela com borda de foco aplicada
+        self._layout_dirty = False
 
     def add_window(self, win: Window):
-        self.windows.append(win)
-        self.focus_idx = len(self.windows) - 1
+        self.windows[win] = None
+        self._focus = win
+        self._layout_dirty = True
         self.focus_window()
 
     def remove_window(self, win: Window):
-        if win in self.windows:
-            idx = self.windows.index(win)
-            self.windows.remove(win)
-            if self.focus_idx >= idx:
-                self.focus_idx = max(0, self.focus_idx - 1)
-            self.focus_window()
+        if win not in self.windows:
+            return False
+        if self._focus is win:
+            # mesma regra de antes: o foco vai para a janela anterior (ou a primeira)
+            keys = list(self.windows)
+            idx = keys.index(win)
+            self._focus = keys[idx - 1] if idx > 0 else (keys[1] if len(keys) > 1 else None)
+        # se a removida não era a focada, o foco continua na mesma janela
+        del self.windows[win]
+        if self._focused_win is win:
+            self._focused_win = None
+        self.focus_window()
+        self._layout_dirty = True
+        return True
+
+    def apply_layout(self):
+        self._layout_dirty = False
+        if self.layout:
+            self.layout.apply(list(self.windows), xconn.monitors()[0])
 
     def get_focused_window(self):
-        if self.windows:
-            return self.windows[self.focus_idx]
-        return None
+        return self._focus
 
     def focus_window(self):
-        """Atualiza foco da janela ativa"""
-        for idx, w in enumerate(self.windows):
-            w.set_focus(idx == self.focus_idx)
-
-    def focus_next(self):
+        """Atualiza foco da janela ativa (só as duas janelas que mudaram)"""
+        old = self._focused_win
+        new = self.get_focused_window()
+        if old is not new:
+            if old:
+                old.set_focus(False)
+            if new:
+                new.set_focus(True)
+            self._focused_win = new
+
+    def _cycle_focus(self, step):
         if self.windows:
-            self.focus_idx = (self.focus_idx + 1) % len(self.windows)
+            keys = list(self.windows)
+            i = keys.index(self._focus) if self._focus in self.windows else 0
+            self._focus = keys[(i + step) % len(keys)]
             self.focus_window()
 
+    def focus_next(self):
+        self._cycle_focus(1)
+
     def focus_prev(self):
-        if self.windows:
-            self.focus_idx = (self.focus_idx - 1) % len(self.windows)
-            self.focus_window()
+        self._cycle_focus(-1)
 
 # =======================
 # Entry point
@@ -1,4 +1,4 @@
-from Xlib import display, X
+from Xlib import X
 from Xlib.ext import randr
 
 class Monitor:
@@ -9,9 +9,8 @@ class Monitor:
         self.height = height
         self.name = name
 
-def get_monitors():
+def get_monitors(dpy):
     """Retorna lista de monitores ativos com posição e tamanho"""
-    dpy = display.Display()
     screen = dpy.screen()
     window = screen.root
 
@@ -1,9 +1,19 @@
 from Xlib import X, display
+from Xlib.protocol import event
 from utils.config import get_config
-from collections import deque
+from array import array
+from core.xconn import SNAP, snap_rects
+from utils.xtrap import call_synced, call_unsynced
 
 cfg = get_config()
 
+# Tamanho do histórico de geometrias (ring buffer de HISTORY_LEN × (x, y, w, h))
+HISTORY_LEN = 10
+
+def flush_pending(dpy):
+    """Envia de uma vez todas as requisições acumuladas no buffer do X"""
+    dpy.flush()
+
 class Window:
     def __init__(self, xwin):
         self.win = xwin
@@ -12,22 +22,33 @@ class Window:
         self.focused = False
         self.border_outer = 4
         self.border_inner = 2
-        self.history = deque(maxlen=10)  # Histórico de posições para swap/restore
-        self.store_geometry()
+        # Histórico de posições para swap/restore: ints contíguos, sem uma tupla por configure
+        self._hist = array('i', [0]) * (4 * HISTORY_LEN)
+        self._hist_head = 0
+        self._hist_len = 0
+        self._monitor = None  # (tupla de monitores, monitor) em cache
+        # Geometria conhecida pelo WM (atualizada em configure e ConfigureNotify)
+        self.x = self.y = self.width = self.height = 0
+        self.border_width = 0  # borda real no servidor (vem do ConfigureNotify)
+        self._pending_geom = None  # último ConfigureRequest ainda não aplicado
+        self._mapped = False  # estado de map conhecido pelo WM; map/unmap repetidos não geram requisição
+
+    def adopt(self):
+        """Passa a gerenciar a janela: guarda a geometria, aplica bordas e mapeia (só no MapRequest)"""
+        self.sync_geometry_from_server()
         self.update_borders()
-        self.win.map()
-        self.display.flush()
+        self.map()
 
     # =======================
     # Bordas e foco
     # =======================
     def update_borders(self):
-        outer_color = int(cfg.get_color("border_outer_focus")[1:], 16) if self.focused else int(cfg.get_color("border_outer_normal")[1:], 16)
-        inner_color = int(cfg.get_color("border_inner_focus")[1:], 16) if self.focused else int(cfg.get_color("border_inner_normal")[1:], 16)
+        # Pixels resolvidos uma vez ao carregar a config
+        outer_color = cfg.border_pixels["outer_focus" if self.focused else "outer_normal"]
+        inner_color = cfg.border_pixels["inner_focus" if self.focused else "inner_normal"]
         # Define borda externa
         self.win.change_attributes(border_pixel=outer_color)
         # Bordas internas podem ser desenhadas via compositing ou overlays (placeholder)
-        self.display.flush()
 
     def set_focus(self, focus=True):
         self.focused = focus
@@ -36,53 +57,110 @@ class Window:
     # =======================
     # Geometria e histórico
     # =======================
-    def store_geometry(self):
-        geom = self.win.get_geometry()
-        self.history.append((geom.x, geom.y, geom.width, geom.height))
+    def store_geometry(self, geom=None):
+        """Guarda (x, y, w, h) no histórico; sem argumento, usa a geometria em cache"""
+        x, y, w, h = geom or (self.x, self.y, self.width, self.height)
+        hist = self._hist
+        i = self._hist_head * 4
+        hist[i] = x
+        hist[i + 1] = y
+        hist[i + 2] = w
+        hist[i + 3] = h
+        self._hist_head = (self._hist_head + 1) % HISTORY_LEN
+        if self._hist_len < HISTORY_LEN:
+            self._hist_len += 1
+
+    def sync_geometry_from_server(self):
+        """Relê a geometria do X (round trip); só para ressincronizar explicitamente"""
+        geom = call_synced(self.win.get_geometry)
+        if geom:
+            self.x, self.y, self.width, self.height = geom.x, geom.y, geom.width, geom.height
+            self.border_width = geom.border_width
+            self.store_geometry()
 
     def restore_geometry(self):
-        if self.history:
-            x, y, w, h = self.history[-1]
-            self.configure(x, y, w, h)
+        if self._hist_len:
+            i = ((self._hist_head - 1) % HISTORY_LEN) * 4
+            self._configure_all(*self._hist[i:i + 4])
 
     def swap_geometry(self, other):
         if isinstance(other, Window):
-            g1 = self.win.get_geometry()
-            g2 = other.win.get_geometry()
-            self.configure(g2.x, g2.y, g2.width, g2.height)
-            other.configure(g1.x, g1.y, g1.width, g1.height)
+            # Geometria em cache: nenhum round trip; só sincroniza quem ainda não foi adotado
+            self._ensure_geometry()
+            other._ensure_geometry()
+            g1 = (self.x, self.y, self.width, self.height)
+            g2 = (other.x, other.y, other.width, other.height)
+            self._configure_all(*g2)
+            other._configure_all(*g1)
 
     # =======================
     # Map/Unmap
     # =======================
     def map(self):
+        if self._mapped:
+            return
         self.win.map()
-        self.display.flush()
+        self._mapped = True
 
     def unmap(self):
+        if not self._mapped:
+            return
         self.win.unmap()
-        self.display.flush()
+        self._mapped = False
 
     # =======================
     # Movimento e redimensionamento
     # =======================
+    def request_configure(self, x, y, width, height):
+        """
+        ConfigureRequest do cliente. Se a geometria não muda, não há configure real,
+        mas o cliente ainda precisa de um ConfigureNotify sintético (ICCCM 4.1.5).
+        """
+        if x == self.x and y == self.y and width == self.width and height == self.height:
+            self.send_configure_notify()
+            return
+        self._configure_all(x, y, width, height)
+
+    def send_configure_notify(self):
+        ev = event.ConfigureNotify(window=self.win, event=self.win, above_sibling=X.NONE,
+                                   x=self.x, y=self.y, width=self.width, height=self.height,
+                                   border_width=self.border_width, override=0)
+        call_unsynced(self.win.send_event, ev, event_mask=X.StructureNotifyMask)
+
     def configure(self, x=None, y=None, width=None, height=None):
+        """Configure parcial iniciado pelo WM; pedidos do cliente passam por request_configure"""
+        # Já está nessa geometria (cache atualizado por ConfigureNotify): nada a enviar
+        if ((x is None or x == self.x) and (y is None or y == self.y) and
+                (width is None or width == self.width) and (height is None or height == self.height)):
+            return
         kwargs = {}
-        if x is not None: kwargs['x'] = x
-        if y is not None: kwargs['y'] = y
-        if width is not None: kwargs['width'] = width
-        if height is not None: kwargs['height'] = height
-        self.win.configure(**kwargs)
+        if x is not None: kwargs['x'] = self.x = x
+        if y is not None: kwargs['y'] = self.y = y
+        if width is not None: kwargs['width'] = self.width = width
+        if height is not None: kwargs['height'] = self.height = height
+        call_unsynced(self.win.configure, **kwargs)
         self.store_geometry()
-        self.display.flush()
+
+    def _configure_all(self, x, y, w, h):
+        """Geometria completa: sem montar kwargs condicionalmente"""
+        if x == self.x and y == self.y and w == self.width and h == self.height:
+            return
+        self.x, self.y, self.width, self.height = x, y, w, h
+        call_unsynced(self.win.configure, x=x, y=y, width=w, height=h)
+        self.store_geometry((x, y, w, h))
+
+    def _ensure_geometry(self):
+        # Janela ainda não adotada (ex.: restaurada do estado salvo): cache vazio
+        if not (self.width and self.height):
+            self.sync_geometry_from_server()
 
     def move(self, dx=0, dy=0):
-        geom = self.win.get_geometry()
-        self.configure(x=geom.x + dx, y=geom.y + dy, width=geom.width, height=geom.height)
+        self._ensure_geometry()
+        self._configure_all(self.x + dx, self.y + dy, self.width, self.height)
 
     def resize(self, dw=0, dh=0):
-        geom = self.win.get_geometry()
-        self.configure(x=geom.x, y=geom.y, width=geom.width + dw, height=geom.height + dh)
+        self._ensure_geometry()
+        self._configure_all(self.x, self.y, self.width + dw, self.height + dh)
 
     # =======================
     # Floating toggle
@@ -100,16 +178,7 @@ class Window:
         """
         corner: 'top_left', 'top_right', 'bottom_left', 'bottom_right'
         monitor: Monitor object
+        Os retângulos são pré-calculados em core.xconn ao enumerar os monitores.
         """
-        w = monitor.width // 2
-        h = monitor.height // 2
-        x, y = 0, 0
-        if corner == "top_left":
-            x, y = 0, 0
-        elif corner == "top_right":
-            x, y = monitor.width - w, 0
-        elif corner == "bottom_left":
-            x, y = 0, monitor.height - h
-        elif corner == "bottom_right":
-            x, y = monitor.width - w, monitor.height - h
-        self.configure(x, y, w, h)
+        rects = SNAP.get(monitor.name) or snap_rects(monitor)
+        self._configure_all(*rects[corner])
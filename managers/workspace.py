@@ -1,57 +1,94 @@
 from managers.window import Window
+from core.xconn import monitors
 from layouts.floating import FloatingLayout
 from layouts.tiling import TilingLayout
 from layouts.monocle import MonocleLayout
 from layouts.fullscreen import FullscreenLayout
 
+# Nome -> classe; instâncias só são criadas quando o layout é usado
+LAYOUT_CLASSES = {
+    "floating": FloatingLayout,
+    "tiling": TilingLayout,
+    "monocle": MonocleLayout,
+    "fullscreen": FullscreenLayout,
+}
+
 class Workspace:
     def __init__(self, wid, layout="tiling"):
         self.id = wid
-        self.windows = []
-        self.focus_index = 0
+        # xid -> Window, na ordem de inserção; foco guardado pela chave
+        self.windows = {}
+        self.focus_key = None
+        self._focused_win = None  # janela com borda de foco aplicada
         self.layout_name = layout
-        self.layouts = {
-            "floating": FloatingLayout(),
-            "tiling": TilingLayout(),
-            "monocle": MonocleLayout(),
-            "fullscreen": FullscreenLayout()
-        }
+        self._layout_dirty = False  # layout reaplicado no fim do lote de eventos
+        self._layout_cache = {}  # nome -> instância já criada
+        self.set_layout(layout)
 
     def add_window(self, win):
-        self.windows.append(win)
-        self.focus_index = len(self.windows) - 1
+        k = win.win.id
+        self.windows[k] = win
+        self.focus_key = k
         self.update_focus()
-        self.apply_layout()
+        self._layout_dirty = True
 
     def remove_window(self, win):
-        if win in self.windows:
-            self.windows.remove(win)
-            if self.focus_index >= len(self.windows):
-                self.focus_index = len(self.windows) - 1
-            self.update_focus()
-            self.apply_layout()
+        """Remove a janela; retorna True se ela pertencia ao workspace"""
+        k = win.win.id
+        if k not in self.windows:
+            return False
+        if self.focus_key == k:
+            # Mesma regra de antes: o foco fica no mesmo índice (limitado à última janela)
+            keys = list(self.windows)
+            idx = keys.index(k)
+            del keys[idx]
+            self.focus_key = keys[min(idx, len(keys) - 1)] if keys else None
+        del self.windows[k]
+        if self._focused_win is win:
+            self._focused_win = None
+        self.update_focus()
+        self._layout_dirty = True
+        return True
 
-    def focus_next(self):
+    def _cycle_focus(self, step):
         if self.windows:
-            self.focus_index = (self.focus_index + 1) % len(self.windows)
+            keys = list(self.windows)
+            i = keys.index(self.focus_key) if self.focus_key in self.windows else 0
+            self.focus_key = keys[(i + step) % len(keys)]
+            # Só a borda muda: nenhum layout depende do foco
             self.update_focus()
-            self.apply_layout()
+
+    def focus_next(self):
+        self._cycle_focus(1)
 
     def focus_prev(self):
-        if self.windows:
-            self.focus_index = (self.focus_index - 1) % len(self.windows)
-            self.update_focus()
-            self.apply_layout()
+        self._cycle_focus(-1)
 
     def get_focused_window(self):
-        if self.windows:
-            return self.windows[self.focus_index]
-        return None
+        return self.windows.get(self.focus_key)
 
     def update_focus(self):
-        for i, w in enumerate(self.windows):
-            w.set_focus(i == self.focus_index)
+        """Atualiza só as duas janelas cujo estado de foco mudou"""
+        old = self._focused_win
+        new = self.get_focused_window()
+        if old is not new:
+            if old:
+                old.set_focus(False)
+            if new:
+                new.set_focus(True)
+            self._focused_win = new
+
+    def set_layout(self, name):
+        """Troca o layout; nomes desconhecidos caem no tiling"""
+        if name not in LAYOUT_CLASSES:
+            name = "tiling"
+        layout = self._layout_cache.get(name)
+        if layout is None:
+            layout = self._layout_cache[name] = LAYOUT_CLASSES[name]()
+        self._layout = layout
+        self.layout_name = name
+        self._layout_dirty = True
 
     def apply_layout(self):
-        layout = self.layouts.get(self.layout_name, TilingLayout())
-        layout.apply(self.windows)
+        self._layout_dirty = False
+        self._layout.apply(list(self.windows.values()), monitors()[0])
@@ -1,8 +1,10 @@
 # core/config_loader.py
 
+import copy
 import importlib.util
 import os
 import logging
+from typing import Dict, Tuple
 
 logger = logging.getLogger("mywm.config")
 logger.addHandler(logging.NullHandler())
@@ -50,18 +52,78 @@ DEFAULTS = {
 }
 
 
+class FrozenConfig(dict):
+    """
+    Config validada, somente leitura e com acesso por atributo
+    (cfg.decorations.border_width). Continua sendo um dict para quem usa .get().
+    """
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("config é somente leitura")
+
+    __setitem__ = __delitem__ = __setattr__ = __delattr__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenConfig, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _freeze(obj):
+    """dicts viram FrozenConfig e listas viram tuplas, recursivamente"""
+    if isinstance(obj, dict):
+        return FrozenConfig({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def _fresh_default(key: str):
+    """Default de uma seção; seções mutáveis são copiadas para não vazar alterações em DEFAULTS"""
+    value = DEFAULTS[key]
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
+def default_config() -> FrozenConfig:
+    return _freeze({key: _fresh_default(key) for key in DEFAULTS})
+
+
 # =========================
 # LOADER
 # =========================
 
-def load_config(path: str = None) -> dict:
+# Config já validada por (caminho, mtime): reload sem mudança no arquivo não reexecuta nada.
+# A FrozenConfig devolvida é compartilhada, e por isso imutável.
+_CFG_CACHE: Dict[Tuple[str, int], FrozenConfig] = {}
+
+def load_config(path: str = None) -> FrozenConfig:
     """Carrega e valida config.py"""
     if path is None:
         path = os.path.expanduser("~/.config/mywm/config.py")
 
-    if not os.path.exists(path):
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except FileNotFoundError:
         logger.warning("Config não encontrada em %s, usando defaults", path)
-        return DEFAULTS.copy()
+        return default_config()
+
+    cached = _CFG_CACHE.get(key)
+    if cached is not None:
+        return cached
 
     try:
         spec = importlib.util.spec_from_file_location("user_config", path)
@@ -71,56 +133,69 @@ def load_config(path: str = None) -> dict:
     except Exception as e:
         raise ConfigError(f"Erro carregando config: {e}")
 
-    return validate_config(cfg)
+    validated = _freeze(validate_config(cfg))
+    _CFG_CACHE.clear()  # só a versão atual do arquivo interessa
+    _CFG_CACHE[key] = validated
+    return validated
 
 
 # =========================
 # VALIDATION
 # =========================
 
+# Checagens de tipo do schema fixo: (seção, chave ou None, tipos, mensagem).
+# Montadas uma vez no import e verificadas num único laço.
+_TYPE_RULES = (
+    ("terminal", None, str, "config['terminal'] deve ser string"),
+    ("workspaces", "names", (list, tuple), "workspaces.names deve ser lista"),
+    ("workspaces", "default_layout", str, "workspaces.default_layout deve ser string"),
+    ("workspaces", "layouts", dict, "workspaces.layouts deve ser dict"),
+    ("workspaces", "autostart", dict, "workspaces.autostart deve ser dict"),
+    ("keybindings", None, list, "keybindings deve ser lista"),
+    ("scratchpads", None, dict, "scratchpads deve ser dict"),
+    ("notifications", None, dict, "notifications deve ser dict"),
+    ("persist", None, dict, "persist deve ser dict"),
+)
+
+# Campos obrigatórios de cada keybinding: (chave, tipo, nome do tipo)
+_KEYBIND_FIELDS = (
+    ("keysym", str, "string"),
+    ("modifiers", list, "lista"),
+    ("action", str, "string"),
+)
+
+
+def _check_types(validated: dict) -> None:
+    for section, key, types, msg in _TYPE_RULES:
+        value = validated[section]
+        if key is not None:
+            value = value.get(key)
+        if not isinstance(value, types):
+            raise ConfigError(msg)
+
+
 def validate_config(cfg: dict) -> dict:
     """Valida e aplica defaults"""
-    validated = DEFAULTS.copy()
+    # preencher defaults: só as seções ausentes são construídas (e copiadas)
+    validated = {key: cfg[key] if key in cfg else _fresh_default(key) for key in DEFAULTS}
 
-    # preencher defaults
-    for key, default_value in DEFAULTS.items():
-        validated[key] = cfg.get(key, default_value)
-
-    # --- Terminal
-    if not isinstance(validated["terminal"], str):
-        raise ConfigError("config['terminal'] deve ser string")
+    # --- Tipos de cada seção (terminal, workspaces, keybindings, scratchpads, notifications, persist)
+    _check_types(validated)
 
     # --- Workspaces
-    ws = validated["workspaces"]
-    if not isinstance(ws.get("names"), (list, tuple)):
-        raise ConfigError("workspaces.names deve ser lista")
-    if not all(isinstance(n, str) for n in ws["names"]):
+    if not all(isinstance(n, str) for n in validated["workspaces"]["names"]):
         raise ConfigError("workspaces.names deve conter strings")
-    if not isinstance(ws.get("default_layout"), str):
-        raise ConfigError("workspaces.default_layout deve ser string")
-    if not isinstance(ws.get("layouts"), dict):
-        raise ConfigError("workspaces.layouts deve ser dict")
-    if not isinstance(ws.get("autostart"), dict):
-        raise ConfigError("workspaces.autostart deve ser dict")
 
     # --- Keybindings
-    kb = validated["keybindings"]
-    if not isinstance(kb, list):
-        raise ConfigError("keybindings deve ser lista")
-    for i, bind in enumerate(kb):
+    for i, bind in enumerate(validated["keybindings"]):
         if not isinstance(bind, dict):
             raise ConfigError(f"keybinding {i} deve ser dict")
-        if "keysym" not in bind or not isinstance(bind["keysym"], str):
-            raise ConfigError(f"keybinding {i} precisa de 'keysym' string")
-        if "modifiers" not in bind or not isinstance(bind["modifiers"], list):
-            raise ConfigError(f"keybinding {i} precisa de 'modifiers' lista")
-        if "action" not in bind or not isinstance(bind["action"], str):
-            raise ConfigError(f"keybinding {i} precisa de 'action' string")
+        for field, ftype, tname in _KEYBIND_FIELDS:
+            if not isinstance(bind.get(field), ftype):
+                raise ConfigError(f"keybinding {i} precisa de '{field}' {tname}")
 
     # --- Scratchpads
     sp = validated["scratchpads"]
-    if not isinstance(sp, dict):
-        raise ConfigError("scratchpads deve ser dict")
     for name, cfg_sp in sp.items():
         if "command" not in cfg_sp:
             raise ConfigError(f"scratchpad '{name}' sem 'command'")
@@ -133,15 +208,9 @@ def validate_config(cfg: dict) -> dict:
 
     # --- Notifications
     notif = validated["notifications"]
-    if not isinstance(notif, dict):
-        raise ConfigError("notifications deve ser dict")
     if "levels" in notif:
         for level, props in notif["levels"].items():
             if not isinstance(props, dict):
                 raise ConfigError(f"notifications.level {level} inválido")
 
-    # --- Persist
-    if not isinstance(validated["persist"], dict):
-        raise ConfigError("persist deve ser dict")
-
     return validated
@@ -21,16 +21,131 @@ Requisitos:
 - opcionalmente: wm.logger (se não existir, usa logger do módulo)
 """
 
+import functools
 import logging
+from array import array
+from contextlib import contextmanager
 from typing import Any, Dict, List, Optional, Tuple, Union
 
-from Xlib import X, Xatom, display, protocol
+from Xlib import X, Xatom, error, protocol
+from Xlib.protocol import request
 
 logger = logging.getLogger("mywm.ewmh")
 logger.addHandler(logging.NullHandler())
 
+# Atoms predefinidos do X como ints simples
+_ATOM = Xatom.ATOM
+_WINDOW = Xatom.WINDOW
+_CARDINAL = Xatom.CARDINAL
+
+# O servidor X nunca libera atoms: nomes gerados por janela fariam a tabela
+# crescer para sempre. atom() recusa novos nomes depois deste limite.
+MAX_ATOMS = 1024
+
+# Atoms internados de uma vez em _init_atoms (os demais vão sob demanda por atom())
+_ATOM_NAMES = (
+    # core / root props
+    "_NET_SUPPORTED", "_NET_SUPPORTING_WM_CHECK", "_NET_WM_NAME",
+    "_NET_CLIENT_LIST", "_NET_CLIENT_LIST_STACKING", "_NET_ACTIVE_WINDOW",
+    "_NET_NUMBER_OF_DESKTOPS", "_NET_DESKTOP_NAMES", "_NET_CURRENT_DESKTOP",
+    "_NET_DESKTOP_VIEWPORT", "_NET_DESKTOP_GEOMETRY",
+
+    # window state & actions
+    "_NET_WM_STATE", "_NET_WM_ALLOWED_ACTIONS", "_NET_WM_PING",
+    "_NET_WM_STATE_FULLSCREEN", "_NET_WM_STATE_MAXIMIZED_VERT", "_NET_WM_STATE_MAXIMIZED_HORZ",
+    "_NET_WM_STATE_HIDDEN", "_NET_WM_STATE_SHADED", "_NET_WM_STATE_SKIP_TASKBAR",
+    "_NET_WM_STATE_SKIP_PAGER", "_NET_WM_STATE_ABOVE",
+
+    # desktop per-window
+    "_NET_WM_DESKTOP", "_NET_CLOSE_WINDOW", "_NET_WM_MOVERESIZE",
+
+    # window types
+    "_NET_WM_WINDOW_TYPE", "_NET_WM_WINDOW_TYPE_DOCK", "_NET_WM_WINDOW_TYPE_DIALOG",
+    "_NET_WM_WINDOW_TYPE_SPLASH", "_NET_WM_WINDOW_TYPE_NORMAL",
+
+    # icccm
+    "UTF8_STRING", "WM_PROTOCOLS", "WM_DELETE_WINDOW", "WM_STATE", "WM_CLASS",
+)
+
+# Anunciados em _NET_SUPPORTED: só hints EWMH (fora o próprio _NET_SUPPORTED), sem UTF8_STRING/ICCCM
+_SUPPORTED_ATOMS = tuple(n for n in _ATOM_NAMES if n.startswith("_NET_") and n != "_NET_SUPPORTED")
+
+# Atoms do caminho quente -> atributo da instância (preenchidos em _init_atoms)
+_HOT_ATOMS = (
+    ("_NET_WM_STATE", "_a_wm_state"),
+    ("_NET_WM_STATE_FULLSCREEN", "_a_fullscreen"),
+    ("_NET_WM_STATE_MAXIMIZED_HORZ", "_a_max_horz"),
+    ("_NET_WM_STATE_MAXIMIZED_VERT", "_a_max_vert"),
+    ("_NET_ACTIVE_WINDOW", "_a_active"),
+    ("_NET_WM_PING", "_a_ping"),
+    ("_NET_CLOSE_WINDOW", "_a_close"),
+    ("_NET_WM_DESKTOP", "_a_wm_desktop"),
+    ("_NET_CLIENT_LIST", "_a_client_list"),
+    ("_NET_CLIENT_LIST_STACKING", "_a_client_list_stacking"),
+    ("_NET_DESKTOP_NAMES", "_a_desktop_names"),
+    ("UTF8_STRING", "_a_utf8"),
+    ("WM_PROTOCOLS", "_a_wm_protocols"),
+    ("WM_DELETE_WINDOW", "_a_wm_delete"),
+)
+
+# Tamanho máximo (em itens de 32 bits) lido de _NET_WM_STATE numa GetProperty adiantada
+_STATE_MAX_LEN = 64
+
+# Caudas constantes dos dados de ClientMessage (5 campos de 32 bits)
+_ZEROS3 = (0, 0, 0)
+_PING_TAIL = (0, 0)
+
+# Máscara dos ClientMessage de _NET_WM_STATE enviados ao root
+_STATE_EVENT_MASK = X.SubstructureRedirectMask | X.SubstructureNotifyMask
+
+# Erros esperados quando o cliente some no meio da operação: só log de debug, sem traceback
+_GONE_ERRORS = (error.BadWindow, error.BadValue)
+
+
+class EWMHError(Exception):
+    """Falha no EWMH (ex.: atoms essenciais não internados, limite de atoms atingido)."""
+
+
+class _PropQueue:
+    """
+    Fila de escritas de propriedades (janela, atom, tipo, formato, dados).
+    drain() envia tudo em sequência, na ordem de inserção, sem flush.
+    """
+    __slots__ = ("_items",)
+
+    def __init__(self):
+        self._items: List[Tuple[Any, int, int, int, Any]] = []
+
+    def append(self, win, atom: int, prop_type: int, fmt: int, data):
+        self._items.append((win, atom, prop_type, fmt, data))
+
+    def drain(self):
+        items, self._items = self._items, []
+        # ordem de inserção: a janela de WM check recebe as propriedades dela
+        # antes de o root passar a apontar para ela
+        for win, atom, prop_type, fmt, data in items:
+            try:
+                win.change_property(atom, prop_type, fmt, data)
+            except Exception:
+                logger.exception("Falha escrevendo propriedade %s na janela %s", atom, win.id)
+
 
 class EWMHManager:
+    # atributos fixos: acesso por slot, sem __dict__ (inclui os atoms de _HOT_ATOMS)
+    __slots__ = (
+        "wm", "dpy", "root", "wm_name", "_wm_name_bytes",
+        "atoms", "_atoms_rev", "_supported_atoms", "_max_pair", "_close_data",
+        "_put_current_desktop", "_put_number_of_desktops", "_put_active_window",
+        "_flush_depth", "_pending_flush",
+        "_desktop_names", "_names_bytes", "_viewport_ints",
+        "_state_cache", "_state_pending",
+        "_last_desktop_idx", "_last_num_desktops", "_last_active_wid",
+        "_last_clients", "_last_stacking", "_wm_check_win", "_cm_dispatch",
+    ) + tuple(attr for _, attr in _HOT_ATOMS)
+
+    # ação de _NET_WM_STATE por nome (set_window_state)
+    _ACTION_CODES = {"remove": 0, "add": 1, "toggle": 2}
+
     def __init__(self, wm: Any, wm_name: str = "MyWM", workspaces: Optional[List[str]] = None):
         """
         :param wm: contexto do WM (deve ter .dpy e .root)
@@ -38,11 +153,38 @@ class EWMHManager:
         :param workspaces: lista opcional de nomes de workspaces para inicializar propriedades
         """
         self.wm = wm
-        self.dpy = getattr(wm, "dpy", None) or display.Display()
-        self.root = getattr(wm, "root", None) or self.dpy.screen().root
+        # sem fallback para display.Display(): isso abriria uma segunda conexão com o X
+        try:
+            self.dpy = wm.dpy
+            self.root = wm.root
+        except AttributeError:
+            raise TypeError("wm must expose .dpy and .root") from None
         self.wm_name = wm_name
+        self._wm_name_bytes = wm_name.encode("utf-8")
         # atoms dict: name -> atom id
         self.atoms: Dict[str, int] = {}
+        self._atoms_rev: Dict[int, str] = {}
+        # >0 enquanto dentro de batch(): os setters não fazem flush
+        self._flush_depth = 0
+        # há escritas no buffer do Xlib ainda não enviadas (ver flush_if_pending)
+        self._pending_flush = False
+        # nomes de desktops já codificados e viewport (um par 0,0 por desktop);
+        # só recalculados quando a lista / quantidade de workspaces muda
+        self._desktop_names: Optional[Tuple[str, ...]] = None
+        self._names_bytes = b""
+        self._viewport_ints = array("I")
+        # window id -> atoms de _NET_WM_STATE lidos do servidor; invalidado por PropertyNotify
+        self._state_cache: Dict[int, frozenset] = {}
+        # window id -> GetProperty já enviada (defer=True) e ainda não lida
+        self._state_pending: Dict[int, Any] = {}
+        # último valor escrito de cada propriedade do root: setters repetidos não vão ao servidor
+        self._last_desktop_idx: Optional[int] = None
+        self._last_num_desktops: Optional[int] = None
+        self._last_active_wid: Optional[int] = None
+        self._last_clients: Optional[array] = None
+        self._last_stacking: Optional[array] = None
+        # janela de _NET_SUPPORTING_WM_CHECK: criada uma vez, destruída em shutdown()
+        self._wm_check_win = None
         self._init_atoms()
         # create supporting WM check window and set basic root properties
         self._init_root_props(workspaces or [])
@@ -51,20 +193,72 @@ class EWMHManager:
     # -------------------------
     # atoms helpers
     # -------------------------
-    def atom(self, name: str) -> int:
-        """Intern an atom and cache it."""
-        if name in self.atoms:
-            return self.atoms[name]
-        try:
-            a = self.dpy.intern_atom(name, only_if_exists=False)
-            self.atoms[name] = a
+    def atom(self, name: str, only_if_exists: bool = False) -> int:
+        """
+        Intern an atom and cache it. Único caminho de InternAtom do WM.
+        only_if_exists=True serve para sondar: não cria o atom no servidor
+        e devolve X.NONE (sem cachear) se ele não existir.
+        """
+        a = self.atoms.get(name)
+        if a is not None:
             return a
+        if len(self.atoms) >= MAX_ATOMS:
+            raise EWMHError("limite de %d atoms atingido ao internar %r; nomes dinâmicos?" % (MAX_ATOMS, name))
+        try:
+            a = self.dpy.intern_atom(name, only_if_exists=only_if_exists)
         except Exception:
             logger.exception("Falha ao internar atom %s", name)
             raise
+        if a == X.NONE:
+            return a
+        self.atoms[name] = a
+        self._atoms_rev[a] = name
+        return a
+
+    # -------------------------
+    # flush coalescing
+    # -------------------------
+    @contextmanager
+    def batch(self):
+        """
+        Agrupa várias escritas de propriedades: um único flush na saída
+        do bloco mais externo.
+            with ewmh.batch():
+                ewmh.set_number_of_desktops(n)
+                ewmh.set_desktop_names(names)
+        """
+        self._flush_depth += 1
+        try:
+            yield self
+        finally:
+            self._flush_depth -= 1
+            if self._flush_depth == 0:
+                self.flush_if_pending()
+
+    def _mark_dirty(self):
+        """Registra que há escritas pendentes; nenhum setter faz flush por conta própria."""
+        self._pending_flush = True
+
+    def flush_if_pending(self) -> bool:
+        """
+        Flush só se algum setter escreveu desde o último. Chamado pelo loop
+        principal ao esvaziar a fila de eventos; devolve True se fez flush.
+        """
+        if not self._pending_flush or self._flush_depth:
+            return False
+        self.flush()
+        return True
+
+    def flush(self):
+        """Envia o buffer agora (barreira explícita, ex.: antes de sair)."""
+        self._pending_flush = False
+        self.dpy.flush()
 
     def atom_name(self, atom_id: int) -> Optional[str]:
-        """Retorna o nome de um atom id (ou None)."""
+        """Retorna o nome de um atom id (ou None); atoms já internados não vão ao servidor."""
+        name = self._atoms_rev.get(atom_id)
+        if name is not None:
+            return name
         try:
             return self.dpy.get_atom_name(atom_id)
         except Exception:
@@ -72,34 +266,54 @@ class EWMHManager:
 
     def _init_atoms(self):
         """Cria/cacheia um conjunto amplo de atoms necessários."""
-        names = [
-            # core / root props
-            "_NET_SUPPORTED", "_NET_SUPPORTING_WM_CHECK", "_NET_WM_NAME",
-            "_NET_CLIENT_LIST", "_NET_CLIENT_LIST_STACKING", "_NET_ACTIVE_WINDOW",
-            "_NET_NUMBER_OF_DESKTOPS", "_NET_DESKTOP_NAMES", "_NET_CURRENT_DESKTOP",
-            "_NET_DESKTOP_VIEWPORT", "_NET_DESKTOP_GEOMETRY",
-
-            # window state & actions
-            "_NET_WM_STATE", "_NET_WM_ALLOWED_ACTIONS", "_NET_WM_PING",
-            "_NET_WM_STATE_FULLSCREEN", "_NET_WM_STATE_MAXIMIZED_VERT", "_NET_WM_STATE_MAXIMIZED_HORZ",
-            "_NET_WM_STATE_HIDDEN", "_NET_WM_STATE_SHADED", "_NET_WM_STATE_SKIP_TASKBAR",
-            "_NET_WM_STATE_SKIP_PAGER", "_NET_WM_STATE_ABOVE",
-
-            # desktop per-window
-            "_NET_WM_DESKTOP", "_NET_CLOSE_WINDOW", "_NET_WM_MOVERESIZE",
-
-            # window types
-            "_NET_WM_WINDOW_TYPE", "_NET_WM_WINDOW_TYPE_DOCK", "_NET_WM_WINDOW_TYPE_DIALOG",
-            "_NET_WM_WINDOW_TYPE_SPLASH", "_NET_WM_WINDOW_TYPE_NORMAL",
-
-            # icccm
-            "UTF8_STRING", "WM_PROTOCOLS", "WM_DELETE_WINDOW", "WM_STATE", "WM_CLASS"
-        ]
-        for n in names:
+        # Envia todos os InternAtom antes de ler qualquer resposta:
+        # um round trip no total, em vez de um por nome
+        pending = []
+        for n in _ATOM_NAMES:
+            if n in self.atoms:
+                continue
             try:
-                self.atom(n)
+                pending.append((n, request.InternAtom(display=self.dpy.display, name=n,
+                                                      only_if_exists=0, defer=True)))
             except Exception:
                 logger.debug("Não conseguiu criar atom %s", n)
+        for n, req in pending:
+            try:
+                req.reply()
+                self.atoms[n] = req.atom
+            except Exception:
+                logger.debug("Não conseguiu criar atom %s", n)
+        # payload de _NET_SUPPORTED, montado uma vez
+        atoms = self.atoms
+        self._supported_atoms = array("I", [atoms[n] for n in _SUPPORTED_ATOMS if n in atoms])
+        # atom id -> nome, para get_window_states
+        self._atoms_rev = {v: k for k, v in self.atoms.items()}
+        # atoms consultados a cada evento, como ints em atributos; validados aqui
+        # uma vez para que nenhum método precise checar None/0 depois
+        missing = [name for name, _ in _HOT_ATOMS if not self.atoms.get(name)]
+        if missing:
+            raise EWMHError("atoms EWMH não internados: %s" % ", ".join(missing))
+        for name, attr in _HOT_ATOMS:
+            setattr(self, attr, self.atoms[name])
+        self._max_pair = frozenset((self._a_max_horz, self._a_max_vert))
+        # WM_DELETE_WINDOW é sempre a mesma mensagem
+        self._close_data = (32, (self._a_wm_delete, X.CurrentTime) + _ZEROS3)
+        # setters de propriedades de formato fixo no root: (atom, tipo, formato) já ligados
+        self._put_current_desktop = self._root_prop_setter("_NET_CURRENT_DESKTOP", _CARDINAL)
+        self._put_number_of_desktops = self._root_prop_setter("_NET_NUMBER_OF_DESKTOPS", _CARDINAL)
+        self._put_active_window = self._root_prop_setter("_NET_ACTIVE_WINDOW", _WINDOW)
+        # client_type -> handler de ClientMessage (handle_client_message)
+        self._cm_dispatch = {
+            self._a_wm_state: self._handle_wm_state,
+            self._a_ping: self.respond_ping,
+            self._a_active: self._handle_active_window,
+            self._a_close: self._handle_close,
+            self._a_wm_protocols: self._handle_close,
+        }
+
+    def _root_prop_setter(self, name: str, prop_type: int):
+        """change_property do root com atom/tipo/formato 32 fixos; recebe só os dados."""
+        return functools.partial(self.root.change_property, self.atom(name), prop_type, 32)
 
     # -------------------------
     # root properties initialization
@@ -110,87 +324,164 @@ class EWMHManager:
         e inicializa desktops (se fornecidos).
         """
         try:
-            # prepare supported list
-            supported_atoms = []
-            for name, atom_id in list(self.atoms.items()):
-                # anounce only important atoms (skip low-level duplicates)
-                supported_atoms.append(atom_id)
-            # write supported to root
-            self.root.change_property(self.atom("_NET_SUPPORTED"), Xatom.ATOM, 32, supported_atoms)
-
-            # supporting wm check: create a tiny window that identifies the WM
-            try:
-                wmcheck = self.root.create_window(0, 0, 1, 1, 0, X.CopyFromParent)
-                # set properties on check window
-                wmcheck.change_property(self.atom("_NET_WM_NAME"), self.atom("UTF8_STRING"), 8, self.wm_name.encode("utf-8"))
-                wmcheck.change_property(self.atom("_NET_SUPPORTING_WM_CHECK"), Xatom.WINDOW, 32, [wmcheck.id])
-                # set root to point to check window
-                self.root.change_property(self.atom("_NET_SUPPORTING_WM_CHECK"), Xatom.WINDOW, 32, [wmcheck.id])
-            except Exception:
-                logger.exception("Falha criando supporting WM check window")
-
-            # set WM name on root as well
-            try:
-                self.root.change_property(self.atom("_NET_WM_NAME"), self.atom("UTF8_STRING"), 8, self.wm_name.encode("utf-8"))
-            except Exception:
-                logger.exception("Falha setando _NET_WM_NAME no root")
-
-            # desktops initialization
-            if workspaces:
+            with self.batch():
+                q = _PropQueue()
+                a_name = self.atom("_NET_WM_NAME")
+                a_utf8 = self.atom("UTF8_STRING")
+                a_check = self.atom("_NET_SUPPORTING_WM_CHECK")
+                name_bytes = self._wm_name_bytes
+
+                # write supported to root (lista montada em _init_atoms)
+                q.append(self.root, self.atom("_NET_SUPPORTED"), _ATOM, 32, self._supported_atoms)
+
+                # supporting wm check: create a tiny window that identifies the WM
+                # (reaproveitada se as props forem reinicializadas)
                 try:
-                    self.set_number_of_desktops(len(workspaces))
-                    self.set_desktop_names(workspaces)
-                    self.set_current_desktop(0)
-                    # set desktop viewport and geometry (viewport zeros)
-                    viewport = []
-                    for _ in range(len(workspaces)):
-                        viewport.extend([0, 0])
-                    self.root.change_property(self.atom("_NET_DESKTOP_VIEWPORT"), Xatom.CARDINAL, 32, viewport)
-                    scr = self.dpy.screen()
-                    self.root.change_property(self.atom("_NET_DESKTOP_GEOMETRY"), Xatom.CARDINAL, 32, [scr.width_in_pixels, scr.height_in_pixels])
+                    wmcheck = self._wm_check_win
+                    if wmcheck is None:
+                        wmcheck = self._wm_check_win = self.root.create_window(0, 0, 1, 1, 0, X.CopyFromParent)
+                    # set properties on check window
+                    q.append(wmcheck, a_name, a_utf8, 8, name_bytes)
+                    q.append(wmcheck, a_check, _WINDOW, 32, [wmcheck.id])
+                    # set root to point to check window
+                    q.append(self.root, a_check, _WINDOW, 32, [wmcheck.id])
                 except Exception:
-                    logger.exception("Falha inicializando propriedades de desktops")
-            self.dpy.flush()
+                    logger.exception("Falha criando supporting WM check window")
+
+                # set WM name on root as well
+                q.append(self.root, a_name, a_utf8, 8, name_bytes)
+
+                # listas de clientes começam vazias: add_client usa PropModeAppend e não pode
+                # herdar ids deixados no root por uma execução anterior
+                self._last_clients = array("I")
+                self._last_stacking = array("I")
+                q.append(self.root, self._a_client_list, _WINDOW, 32, self._last_clients)
+                q.append(self.root, self._a_client_list_stacking, _WINDOW, 32, self._last_stacking)
+
+                # desktops initialization
+                if workspaces:
+                    try:
+                        # mesmas escritas dos set_*, mas pela fila (na ordem das demais);
+                        # o estado de dedupe deles fica sincronizado
+                        names = tuple(workspaces)
+                        n = len(names)
+                        self._viewport_ints = array("I", bytes(8 * n))
+                        self._names_bytes = b"\0".join([w.encode("utf-8") for w in names])
+                        q.append(self.root, self.atom("_NET_NUMBER_OF_DESKTOPS"), _CARDINAL, 32, [n])
+                        q.append(self.root, self._a_desktop_names, self._a_utf8, 8, self._names_bytes)
+                        q.append(self.root, self.atom("_NET_CURRENT_DESKTOP"), _CARDINAL, 32, [0])
+                        self._last_num_desktops = n
+                        self._desktop_names = names
+                        self._last_desktop_idx = 0
+                        # set desktop viewport and geometry (viewport zeros)
+                        q.append(self.root, self.atom("_NET_DESKTOP_VIEWPORT"), _CARDINAL, 32, self._viewport_ints)
+                        scr = self.dpy.screen()
+                        q.append(self.root, self.atom("_NET_DESKTOP_GEOMETRY"), _CARDINAL, 32,
+                                 [scr.width_in_pixels, scr.height_in_pixels])
+                    except Exception:
+                        logger.exception("Falha inicializando propriedades de desktops")
+
+                # todas as escritas de uma vez; batch() faz o flush na saída
+                q.drain()
+                self._mark_dirty()
         except Exception:
             logger.exception("Falha na inicialização root props EWMH")
 
+    def shutdown(self):
+        """Destrói a janela de _NET_SUPPORTING_WM_CHECK (chamar ao encerrar o WM)."""
+        win, self._wm_check_win = self._wm_check_win, None
+        if win is None:
+            return
+        try:
+            win.destroy()
+            self._mark_dirty()
+        except Exception:
+            logger.debug("Falha destruindo a janela de WM check")
+
     # -------------------------
     # client list / stacking
     # -------------------------
     def update_client_list(self, clients: List[Any], stacking: Optional[List[Any]] = None):
         """Atualiza _NET_CLIENT_LIST e opcionalmente _NET_CLIENT_LIST_STACKING."""
         try:
-            ids = [getattr(w, "id", w) for w in clients]
-            self.root.change_property(self.atom("_NET_CLIENT_LIST"), Xatom.WINDOW, 32, ids)
+            # aceita objetos Window, ids ou um array('I') de ids (copiado: quem chama continua dono dele)
+            if isinstance(clients, array):
+                ids = array("I", clients)
+            else:
+                ids = array("I", [getattr(w, "id", w) for w in clients])
+            if ids != self._last_clients:
+                self.root.change_property(self._a_client_list, _WINDOW, 32, ids)
+                self._mark_dirty()
+                self._last_clients = ids
             if stacking is not None:
-                ids2 = [getattr(w, "id", w) for w in stacking]
-                self.root.change_property(self.atom("_NET_CLIENT_LIST_STACKING"), Xatom.WINDOW, 32, ids2)
-            self.dpy.flush()
+                ids2 = array("I", [getattr(w, "id", w) for w in stacking])
+                if ids2 != self._last_stacking:
+                    self.root.change_property(self._a_client_list_stacking, _WINDOW, 32, ids2)
+                    self._mark_dirty()
+                    self._last_stacking = ids2
         except Exception:
             logger.exception("update_client_list falhou")
 
+    def add_client(self, win):
+        """Acrescenta uma janela ao fim de _NET_CLIENT_LIST (PropModeAppend), sem reescrever a lista."""
+        try:
+            wid = getattr(win, "id", win)
+            if self._last_clients is None:
+                # lista no servidor desconhecida: reescreve em vez de acrescentar
+                self.update_client_list([wid])
+                return
+            if wid in self._last_clients:
+                return
+            self.root.change_property(self._a_client_list, _WINDOW, 32, [wid], mode=X.PropModeAppend)
+            self._last_clients.append(wid)
+            self._mark_dirty()
+        except Exception:
+            logger.exception("add_client falhou")
+
+    def remove_client(self, win):
+        """Tira uma janela de _NET_CLIENT_LIST; remoção exige reescrever a lista."""
+        wid = getattr(win, "id", win)
+        if self._last_clients is None or wid not in self._last_clients:
+            return
+        ids = array("I", self._last_clients)
+        ids.remove(wid)
+        self.update_client_list(ids)
+
     # -------------------------
     # desktops helpers
     # -------------------------
     def set_number_of_desktops(self, n: int):
         try:
-            self.root.change_property(self.atom("_NET_NUMBER_OF_DESKTOPS"), Xatom.CARDINAL, 32, [int(n)])
-            self.dpy.flush()
+            n = int(n)
+            if len(self._viewport_ints) != 2 * n:
+                # 2 CARDINAL zerados por desktop, alocados de uma vez
+                self._viewport_ints = array("I", bytes(8 * n))
+            if n != self._last_num_desktops:
+                self._put_number_of_desktops([n])
+                self._mark_dirty()
+                self._last_num_desktops = n
         except Exception:
             logger.exception("set_number_of_desktops falhou")
 
     def set_desktop_names(self, names: List[str]):
         try:
-            raw = b"\0".join([n.encode("utf-8") for n in names])
-            self.root.change_property(self.atom("_NET_DESKTOP_NAMES"), self.atom("UTF8_STRING"), 8, raw)
-            self.dpy.flush()
+            names = tuple(names)
+            if names == self._desktop_names:
+                return  # já escritos
+            self._names_bytes = b"\0".join([n.encode("utf-8") for n in names])
+            self.root.change_property(self._a_desktop_names, self._a_utf8, 8, self._names_bytes)
+            self._mark_dirty()
+            self._desktop_names = names
         except Exception:
             logger.exception("set_desktop_names falhou")
 
     def set_current_desktop(self, idx: int):
         try:
-            self.root.change_property(self.atom("_NET_CURRENT_DESKTOP"), Xatom.CARDINAL, 32, [int(idx)])
-            self.dpy.flush()
+            idx = int(idx)
+            if idx != self._last_desktop_idx:
+                self._put_current_desktop([idx])
+                self._mark_dirty()
+                self._last_desktop_idx = idx
         except Exception:
             logger.exception("set_current_desktop falhou")
 
@@ -199,15 +490,16 @@ class EWMHManager:
     # -------------------------
     def set_active_window(self, win):
         """
-        Tenta sinalizar _NET_ACTIVE_WINDOW. Usa ClientMessage conforme spec.
+        Atualiza _NET_ACTIVE_WINDOW no root. Quem mantém essa propriedade é o
+        próprio WM: escreve direto, sem ClientMessage que voltaria para o loop.
         """
         try:
-            a = self.atom("_NET_ACTIVE_WINDOW")
-            # spec recommends sending ClientMessage
-            data = (32, (2, X.CurrentTime, getattr(win, "id", win), 0, 0))  # source indication 2 (pager)
-            ev = protocol.event.ClientMessage(window=win, client_type=a, data=data)
-            self.root.send_event(ev, event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask)
-            self.dpy.flush()
+            wid = getattr(win, "id", win)
+            if wid == self._last_active_wid:
+                return
+            self._put_active_window([wid])
+            self._mark_dirty()
+            self._last_active_wid = wid
         except Exception:
             logger.exception("set_active_window falhou")
 
@@ -217,7 +509,7 @@ class EWMHManager:
     def get_window_state_atoms(self, win) -> List[int]:
         """Retorna a lista de atom ids atualmente na propriedade _NET_WM_STATE da janela."""
         try:
-            prop = win.get_full_property(self.atom("_NET_WM_STATE"), Xatom.ATOM)
+            prop = win.get_full_property(self._a_wm_state, _ATOM)
             if not prop:
                 return []
             # prop.value é uma sequência de atom ints
@@ -226,11 +518,81 @@ class EWMHManager:
             logger.exception("get_window_state_atoms falhou")
             return []
 
+    def request_state(self, win):
+        """
+        Envia o GetProperty de _NET_WM_STATE sem esperar a resposta; _get_state
+        só bloqueia quando (e se) o valor for realmente usado.
+        """
+        wid = win.id
+        if wid in self._state_cache or wid in self._state_pending:
+            return
+        try:
+            self._state_pending[wid] = request.GetProperty(
+                display=self.dpy.display, delete=0, window=wid, property=self._a_wm_state,
+                type=_ATOM, long_offset=0, long_length=_STATE_MAX_LEN, defer=True)
+            self._mark_dirty()
+        except Exception:
+            logger.exception("request_state falhou")
+
+    def _get_state(self, win) -> frozenset:
+        """_NET_WM_STATE da janela como frozenset, com um único GetProperty por mudança."""
+        wid = win.id
+        states = self._state_cache.get(wid)
+        if states is not None:
+            return states
+        req = self._state_pending.pop(wid, None)
+        try:
+            if req is not None:
+                req.reply()
+            if req is not None and not req.bytes_after:
+                states = frozenset(req.value[1]) if req.property_type else frozenset()
+            else:
+                # sem pedido adiantado (ou lista maior que _STATE_MAX_LEN): leitura completa
+                prop = win.get_full_property(self._a_wm_state, _ATOM)
+                states = frozenset(prop.value) if prop else frozenset()
+        except _GONE_ERRORS as e:
+            logger.debug("_get_state: janela %s indisponível (%s)", wid, e)
+            return frozenset()
+        except Exception:
+            logger.exception("_get_state falhou")
+            return frozenset()
+        self._state_cache[wid] = states
+        return states
+
+    def prefetch_states(self, wins) -> Dict[int, List[int]]:
+        """
+        Estados de várias janelas com um único round trip: todos os GetProperty
+        saem antes da primeira resposta ser lida.
+        """
+        wins = list(wins)
+        for win in wins:
+            self.request_state(win)
+        return {win.id: list(self._get_state(win)) for win in wins}
+
+    def on_property_notify(self, ev):
+        """Deve ser chamado pelo loop principal em PropertyNotify: descarta o estado em cache."""
+        if ev.atom == self._a_wm_state:
+            wid = ev.window.id
+            self._state_cache.pop(wid, None)
+            self._state_pending.pop(wid, None)
+
+    def forget_window(self, wid: int):
+        """Descarta o estado em cache de uma janela destruída."""
+        self._state_cache.pop(wid, None)
+        self._state_pending.pop(wid, None)
+
+    def is_fullscreen(self, win) -> bool:
+        return self._a_fullscreen in self._get_state(win)
+
+    def is_maximized(self, win) -> bool:
+        """True só se os dois eixos (HORZ e VERT) estiverem maximizados."""
+        return self._max_pair <= self._get_state(win)
+
     def get_window_states(self, win) -> List[str]:
         """Retorna nomes legíveis dos estados presentes na janela (e.g. ['_NET_WM_STATE_FULLSCREEN'])."""
         try:
-            atoms = self.get_window_state_atoms(win)
-            rev = {v: k for k, v in self.atoms.items()}
+            atoms = self._get_state(win)
+            rev = self._atoms_rev
             return [rev.get(a, str(a)) for a in atoms]
         except Exception:
             return []
@@ -242,18 +604,35 @@ class EWMHManager:
         """
         try:
             if isinstance(action, str):
-                action_map = {"add": 1, "remove": 0, "toggle": 2}
-                action = action_map.get(action.lower(), 2)
-            a_state = self.atom("_NET_WM_STATE")
-            a_target = self.atom(state_atom_name)
-            data = (32, (action, a_target, 0, 0, 0))
-            ev = protocol.event.ClientMessage(window=win, client_type=a_state, data=data)
-            # send to root as per EWMH spec (root should deliver it)
-            self.root.send_event(ev, event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask)
-            self.dpy.flush()
+                action = self._ACTION_CODES.get(action.lower(), 2)
+            self._send_state_message(win, (32, (action, self.atom(state_atom_name)) + _ZEROS3))
+        except _GONE_ERRORS as e:
+            logger.debug("set_window_state: %s", e)
         except Exception:
             logger.exception("set_window_state falhou")
 
+    def _send_state_message(self, win, data):
+        ev = protocol.event.ClientMessage(window=win, client_type=self._a_wm_state, data=data)
+        # send to root as per EWMH spec (root should deliver it)
+        self.root.send_event(ev, event_mask=_STATE_EVENT_MASK)
+        self._mark_dirty()
+
+    # set_fullscreen/set_maximized partem do próprio WM: o estado é aplicado
+    # direto (mesmos hooks), sem ClientMessage enviado ao root e lido de volta
+    def set_fullscreen(self, win, enable: bool = True):
+        """Liga (ou desliga) _NET_WM_STATE_FULLSCREEN na janela."""
+        if enable:
+            self.add_state_local(win, "_NET_WM_STATE_FULLSCREEN")
+        else:
+            self.remove_state_local(win, "_NET_WM_STATE_FULLSCREEN")
+
+    def set_maximized(self, win, enable: bool = True):
+        """Maximiza (ou restaura) os dois eixos numa única escrita."""
+        if enable:
+            self.add_state_local(win, "_NET_WM_STATE_MAXIMIZED_HORZ", "_NET_WM_STATE_MAXIMIZED_VERT")
+        else:
+            self.remove_state_local(win, "_NET_WM_STATE_MAXIMIZED_HORZ", "_NET_WM_STATE_MAXIMIZED_VERT")
+
     # convenience wrappers
     def add_state(self, win, name: str):
         self.set_window_state(win, name, 1)
@@ -269,9 +648,9 @@ class EWMHManager:
     # -------------------------
     def move_window_to_desktop(self, win, desktop_index: int):
         try:
-            a = self.atom("_NET_WM_DESKTOP")
-            win.change_property(a, Xatom.CARDINAL, 32, [int(desktop_index)])
-            self.dpy.flush()
+            a = self._a_wm_desktop
+            win.change_property(a, _CARDINAL, 32, [int(desktop_index)])
+            self._mark_dirty()
         except Exception:
             logger.exception("move_window_to_desktop falhou")
 
@@ -283,12 +662,9 @@ class EWMHManager:
         Envia ClientMessage WM_PROTOCOLS/WM_DELETE_WINDOW (ICCCM way).
         """
         try:
-            wm_protocols = self.atom("WM_PROTOCOLS")
-            wm_delete = self.atom("WM_DELETE_WINDOW")
-            data = (32, (wm_delete, X.CurrentTime, 0, 0, 0))
-            ev = protocol.event.ClientMessage(window=win, client_type=wm_protocols, data=data)
+            ev = protocol.event.ClientMessage(window=win, client_type=self._a_wm_protocols, data=self._close_data)
             win.send_event(ev, event_mask=X.NoEventMask)
-            self.dpy.flush()
+            self._mark_dirty()
         except Exception:
             logger.exception("close_window falhou")
 
@@ -305,14 +681,14 @@ class EWMHManager:
             # data32: [source, timestamp, win_id, ...] per some implementations
             data32 = ev.data.data32
             # build response: same client_type, zero first field
-            resp_atom = self.atom("_NET_WM_PING")
+            resp_atom = self._a_ping
             # Compose reply: action fields depend on client expectations; send a minimal reply
             # We'll send a ClientMessage back to root with data (0, timestamp, window id, 0, 0)
             timestamp = int(data32[1]) if len(data32) > 1 else 0
             win_id = int(data32[2]) if len(data32) > 2 else 0
-            resp = protocol.event.ClientMessage(window=self.root, client_type=resp_atom, data=(32, (0, timestamp, win_id, 0, 0)))
+            resp = protocol.event.ClientMessage(window=self.root, client_type=resp_atom, data=(32, (0, timestamp, win_id) + _PING_TAIL))
             self.root.send_event(resp, event_mask=X.SubstructureNotifyMask)
-            self.dpy.flush()
+            self._mark_dirty()
         except Exception:
             logger.exception("respond_ping falhou")
 
@@ -352,163 +728,152 @@ class EWMHManager:
          - _NET_WM_PING
         """
         try:
-            ctype = int(ev.client_type)
-            # compare with known atoms
-            if ctype == self.atom("_NET_WM_STATE"):
-                parsed = self.parse_net_wm_state_message(ev)
-                if not parsed:
-                    return
-                action, a1, a2 = parsed
-                # check if these atoms correspond to fullscreen or maximize
-                fs_atom = self.atom("_NET_WM_STATE_FULLSCREEN")
-                max_h = self.atom("_NET_WM_STATE_MAXIMIZED_HORZ")
-                max_v = self.atom("_NET_WM_STATE_MAXIMIZED_VERT")
-                target_win = ev.window
-                # if atom matches fullscreen
-                if a1 == fs_atom or a2 == fs_atom:
-                    if action == 1:  # add
-                        # mark state and instruct wm to actually resize/hide borders
-                        try:
-                            self.add_state_local(target_win, "_NET_WM_STATE_FULLSCREEN")
-                        except Exception:
-                            pass
-                    elif action == 0:  # remove
-                        try:
-                            self.remove_state_local(target_win, "_NET_WM_STATE_FULLSCREEN")
-                        except Exception:
-                            pass
-                    elif action == 2:  # toggle
-                        try:
-                            self.toggle_state_local(target_win, "_NET_WM_STATE_FULLSCREEN")
-                        except Exception:
-                            pass
-                # maximized handling: add/remove both horiz+vert
-                if a1 == max_h or a2 == max_h or a1 == max_v or a2 == max_v:
-                    # treat as maximize toggle/add/remove -> up to WM to act
-                    if action == 1:
-                        try:
-                            self.add_state_local(target_win, "_NET_WM_STATE_MAXIMIZED_HORZ")
-                            self.add_state_local(target_win, "_NET_WM_STATE_MAXIMIZED_VERT")
-                        except Exception:
-                            pass
-                    elif action == 0:
-                        try:
-                            self.remove_state_local(target_win, "_NET_WM_STATE_MAXIMIZED_HORZ")
-                            self.remove_state_local(target_win, "_NET_WM_STATE_MAXIMIZED_VERT")
-                        except Exception:
-                            pass
-                    elif action == 2:
-                        try:
-                            self.toggle_state_local(target_win, "_NET_WM_STATE_MAXIMIZED_HORZ")
-                            self.toggle_state_local(target_win, "_NET_WM_STATE_MAXIMIZED_VERT")
-                        except Exception:
-                            pass
-                # other states can be handled similarly (skip_taskbar, above, etc.)
-                return
-
-            if ctype == self.atom("_NET_WM_PING"):
-                # respond ping to indicate WM is alive
-                self.respond_ping(ev)
-                return
+            # um lookup por atom id (tabela montada em _init_atoms)
+            handler = self._cm_dispatch.get(int(ev.client_type))
+            if handler is not None:
+                handler(ev)
+        except Exception:
+            logger.exception("Erro no handle_client_message")
 
-            if ctype == self.atom("_NET_ACTIVE_WINDOW"):
-                # client asking to be active: generally the WM should honor or ignore
-                # We simply set the active window property and let window manager focus as appropriate.
+    def _handle_wm_state(self, ev: protocol.event.ClientMessage):
+        parsed = self.parse_net_wm_state_message(ev)
+        if not parsed:
+            return
+        action, a1, a2 = parsed
+        # check if these atoms correspond to fullscreen or maximize
+        fs_atom = self._a_fullscreen
+        max_h = self._a_max_horz
+        max_v = self._a_max_vert
+        target_win = ev.window
+        # if atom matches fullscreen
+        if a1 == fs_atom or a2 == fs_atom:
+            if action == 1:  # add
+                # mark state and instruct wm to actually resize/hide borders
                 try:
-                    # data32: [source, timestamp, window, ...]
-                    if hasattr(ev, "data") and hasattr(ev.data, "data32"):
-                        wid = int(ev.window.id) if hasattr(ev, "window") and ev.window else (int(ev.data.data32[2]) if len(ev.data.data32) > 2 else None)
-                        # set property and optionally call wm API to focus
-                        if wid:
-                            # set root property
-                            try:
-                                self.root.change_property(self.atom("_NET_ACTIVE_WINDOW"), Xatom.WINDOW, 32, [wid])
-                                self.dpy.flush()
-                            except Exception:
-                                pass
-                            # ask wm to focus the window object if it knows how
-                            try:
-                                if hasattr(self.wm, "focus_window_by_wid"):
-                                    self.wm.focus_window_by_wid(wid)
-                            except Exception:
-                                pass
+                    self.add_state_local(target_win, "_NET_WM_STATE_FULLSCREEN")
                 except Exception:
-                    logger.exception("Falha tratando _NET_ACTIVE_WINDOW clientmessage")
-                return
-
-            if ctype == self.atom("_NET_CLOSE_WINDOW") or ctype == self.atom("WM_PROTOCOLS"):
-                # close request: try to close the target window
+                    pass
+            elif action == 0:  # remove
                 try:
-                    target = ev.window
-                    if target:
-                        self.close_window(target)
+                    self.remove_state_local(target_win, "_NET_WM_STATE_FULLSCREEN")
                 except Exception:
-                    logger.exception("Falha tratando _NET_CLOSE_WINDOW/WM_PROTOCOLS")
-                return
+                    pass
+            elif action == 2:  # toggle
+                try:
+                    self.toggle_state_local(target_win, "_NET_WM_STATE_FULLSCREEN")
+                except Exception:
+                    pass
+        # maximized handling: add/remove both horiz+vert
+        if a1 == max_h or a2 == max_h or a1 == max_v or a2 == max_v:
+            # treat as maximize toggle/add/remove -> up to WM to act
+            # os dois eixos numa única escrita de _NET_WM_STATE
+            if action == 1:
+                self.add_state_local(target_win, "_NET_WM_STATE_MAXIMIZED_HORZ", "_NET_WM_STATE_MAXIMIZED_VERT")
+            elif action == 0:
+                self.remove_state_local(target_win, "_NET_WM_STATE_MAXIMIZED_HORZ", "_NET_WM_STATE_MAXIMIZED_VERT")
+            elif action == 2:
+                self.toggle_state_local(target_win, "_NET_WM_STATE_MAXIMIZED_HORZ", "_NET_WM_STATE_MAXIMIZED_VERT")
+        # other states can be handled similarly (skip_taskbar, above, etc.)
+
+    def _handle_active_window(self, ev: protocol.event.ClientMessage):
+        # client asking to be active: generally the WM should honor or ignore
+        # We simply set the active window property and let window manager focus as appropriate.
+        try:
+            # data32: [source, timestamp, window, ...]
+            if hasattr(ev, "data") and hasattr(ev.data, "data32"):
+                wid = int(ev.window.id) if hasattr(ev, "window") and ev.window else (int(ev.data.data32[2]) if len(ev.data.data32) > 2 else None)
+                # set property and optionally call wm API to focus
+                if wid:
+                    # set root property
+                    try:
+                        self._put_active_window([wid])
+                        self._mark_dirty()
+                        self._last_active_wid = wid
+                    except Exception:
+                        pass
+                    # ask wm to focus the window object if it knows how
+                    try:
+                        if hasattr(self.wm, "focus_window_by_wid"):
+                            self.wm.focus_window_by_wid(wid)
+                    except Exception:
+                        pass
+        except Exception:
+            logger.exception("Falha tratando _NET_ACTIVE_WINDOW clientmessage")
 
+    def _handle_close(self, ev: protocol.event.ClientMessage):
+        # close request: try to close the target window
+        try:
+            target = ev.window
+            if target:
+                self.close_window(target)
         except Exception:
-            logger.exception("Erro no handle_client_message")
+            logger.exception("Falha tratando _NET_CLOSE_WINDOW/WM_PROTOCOLS")
 
     # -------------------------
     # local state helper functions (update properties and optionally call wm hooks)
     # -------------------------
-    def add_state_local(self, win, state_name: str):
-        """Adiciona a state atom localmente (escreve propriedade) e notifica wm via hook se presente."""
+    def add_state_local(self, win, *state_names: str):
+        """Adiciona state atoms localmente (escreve propriedade) e notifica wm via hook se presente."""
         try:
-            # set property: read current, append if not present
-            a_state = self.atom("_NET_WM_STATE")
-            cur = win.get_full_property(a_state, Xatom.ATOM)
-            vals = list(cur.value) if cur else []
-            target = self.atom(state_name)
-            if target not in vals:
-                vals.append(target)
-                win.change_property(a_state, Xatom.ATOM, 32, vals)
-                self.dpy.flush()
-            # call optional hook
-            if hasattr(self.wm, "on_window_state_added"):
-                try:
-                    self.wm.on_window_state_added(win, state_name)
-                except Exception:
-                    logger.exception("hook on_window_state_added falhou")
+            atoms = [self.atom(n) for n in state_names]
+            old = self._set_states(win, adds=atoms)
+            # hook só para o que de fato mudou: estado já presente não gera nada
+            for n, a in zip(state_names, atoms):
+                if a not in old:
+                    self._call_hook("on_window_state_added", win, n)
+        except _GONE_ERRORS as e:
+            logger.debug("add_state_local: %s", e)
         except Exception:
             logger.exception("add_state_local falhou")
 
-    def remove_state_local(self, win, state_name: str):
+    def remove_state_local(self, win, *state_names: str):
         try:
-            a_state = self.atom("_NET_WM_STATE")
-            cur = win.get_full_property(a_state, Xatom.ATOM)
-            vals = list(cur.value) if cur else []
-            target = self.atom(state_name)
-            if target in vals:
-                vals.remove(target)
-                win.change_property(a_state, Xatom.ATOM, 32, vals)
-                self.dpy.flush()
-            if hasattr(self.wm, "on_window_state_removed"):
-                try:
-                    self.wm.on_window_state_removed(win, state_name)
-                except Exception:
-                    logger.exception("hook on_window_state_removed falhou")
+            atoms = [self.atom(n) for n in state_names]
+            old = self._set_states(win, removes=atoms)
+            for n, a in zip(state_names, atoms):
+                if a in old:
+                    self._call_hook("on_window_state_removed", win, n)
+        except _GONE_ERRORS as e:
+            logger.debug("remove_state_local: %s", e)
         except Exception:
             logger.exception("remove_state_local falhou")
 
-    def toggle_state_local(self, win, state_name: str):
+    def toggle_state_local(self, win, *state_names: str):
         try:
-            a_state = self.atom("_NET_WM_STATE")
-            cur = win.get_full_property(a_state, Xatom.ATOM)
-            vals = list(cur.value) if cur else []
-            target = self.atom(state_name)
-            if target in vals:
-                vals.remove(target)
-                action = "removed"
-            else:
-                vals.append(target)
-                action = "added"
-            win.change_property(a_state, Xatom.ATOM, 32, vals)
-            self.dpy.flush()
-            if hasattr(self.wm, "on_window_state_toggled"):
-                try:
-                    self.wm.on_window_state_toggled(win, state_name, action)
-                except Exception:
-                    logger.exception("hook on_window_state_toggled falhou")
+            targets = {n: self.atom(n) for n in state_names}
+            states = self._get_state(win)
+            present = [a for a in targets.values() if a in states]
+            self._set_states(win, adds=[a for a in targets.values() if a not in states], removes=present)
+            for n, a in targets.items():
+                self._call_hook("on_window_state_toggled", win, n, "removed" if a in present else "added")
+        except _GONE_ERRORS as e:
+            logger.debug("toggle_state_local: %s", e)
         except Exception:
             logger.exception("toggle_state_local falhou")
+
+    def _set_states(self, win, adds=(), removes=()) -> frozenset:
+        """
+        Aplica adds/removes ao _NET_WM_STATE com uma leitura (do cache) e no
+        máximo uma escrita, mesmo mexendo em vários estados (ex.: os dois eixos de maximize).
+        Sem mudança não há escrita (nem PropertyNotify). Devolve o estado anterior.
+        """
+        states = self._get_state(win)
+        new = states.union(adds).difference(removes)
+        if new != states:
+            self._write_state(win, new)
+        return states
+
+    def _call_hook(self, hook: str, *args):
+        fn = getattr(self.wm, hook, None)
+        if fn is not None:
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception("hook %s falhou", hook)
+
+    def _write_state(self, win, states: frozenset):
+        """Escreve _NET_WM_STATE e mantém o cache igual ao que foi enviado."""
+        # array('I') já é o buffer de 32 bits do protocolo; o cache segue como frozenset
+        win.change_property(self._a_wm_state, _ATOM, 32, array("I", states))
+        self._state_cache[win.id] = states
+        self._mark_dirty()
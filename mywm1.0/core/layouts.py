@@ -1,7 +1,8 @@
 # core/layouts.py - versão evoluída
 # Melhorias: estrutura clara, logging, tratamento de erros, hooks, testável.
 
-from typing import List, Any, Dict
+from array import array
+from typing import List, Any, Dict, Tuple
 import logging
 
 logger = logging.getLogger("mywm.layouts")
@@ -14,20 +15,46 @@ MIN_H = 30
 class BaseLayout:
     """Classe base para layouts."""
 
+    # sem __dict__ por instância; name/is_floating são atributos de classe
+    __slots__ = ("_last_geom",)
+
     name: str = "base"
     is_floating: bool = False
 
+    def __init__(self):
+        # window id -> última geometria enviada por este layout
+        self._last_geom: Dict[int, Tuple[int, int, int, int]] = {}
+
     def apply(self, windows: List[Any], screen_geom: Any) -> None:
         raise NotImplementedError
 
+    def _configure(self, w: Any, x: int, y: int, width: int, height: int) -> bool:
+        """configure só quando a geometria mudou desde a última aplicação; True se enviou."""
+        g = (x, y, width, height)
+        wid = getattr(w, "id", None)
+        if self._last_geom.get(wid) == g:
+            return False
+        w.configure(x=x, y=y, width=width, height=height)
+        self._last_geom[wid] = g
+        return True
+
+    def reset_cache(self) -> None:
+        """Esquece as geometrias enviadas (outro layout pode ter mexido nas janelas)."""
+        self._last_geom.clear()
+
+    def forget_geometry(self, win: Any) -> None:
+        """Janela desmapeada ou movida fora do layout: o próximo apply volta a configurá-la."""
+        self._last_geom.pop(getattr(win, "id", win), None)
+
     def on_window_add(self, win: Any) -> None:
         pass
 
     def on_window_remove(self, win: Any) -> None:
-        pass
+        self._last_geom.pop(getattr(win, "id", None), None)
 
 
 class Monocle(BaseLayout):
+    __slots__ = ()
     name = "monocle"
     is_floating = False
 
@@ -37,12 +64,10 @@ class Monocle(BaseLayout):
         for i, w in enumerate(windows):
             try:
                 if i == 0:
-                    w.configure(
-                        x=screen_geom.x,
-                        y=screen_geom.y,
-                        width=screen_geom.width,
-                        height=screen_geom.height,
-                    )
+                    # geometria igual à última enviada: sem configure; o map é sempre
+                    # verificado (a janela pode ter sido desmapeada por outro caminho)
+                    self._configure(w, screen_geom.x, screen_geom.y,
+                                    screen_geom.width, screen_geom.height)
                     self._safe_map(w)
                 else:
                     self._safe_unmap(w)
@@ -61,6 +86,7 @@ class Monocle(BaseLayout):
                 logger.debug("map falhou")
 
     def _safe_unmap(self, w):
+        self.forget_geometry(w)
         try:
             w.unmap()
         except Exception:
@@ -68,6 +94,7 @@ class Monocle(BaseLayout):
 
 
 class Fullscreen(BaseLayout):
+    __slots__ = ()
     name = "fullscreen"
     is_floating = False
 
@@ -76,17 +103,14 @@ class Fullscreen(BaseLayout):
             return
         try:
             win = windows[0]
-            win.configure(
-                x=screen_geom.x,
-                y=screen_geom.y,
-                width=screen_geom.width,
-                height=screen_geom.height,
-            )
+            self._configure(win, screen_geom.x, screen_geom.y,
+                            screen_geom.width, screen_geom.height)
             try:
                 win.map()
             except Exception:
                 logger.debug("map falhou")
             for w in windows[1:]:
+                self.forget_geometry(w)
                 try:
                     w.unmap()
                 except Exception:
@@ -96,32 +120,49 @@ class Fullscreen(BaseLayout):
 
 
 class Floating(BaseLayout):
+    __slots__ = ("_xs", "_ys", "_ws", "_hs", "_ids", "_id_to_idx", "snap_threshold")
     name = "floating"
     is_floating = True
 
     def __init__(self):
-        self.positions: Dict[int, Dict[str, int]] = {}
+        super().__init__()
+        # posições em arrays paralelos (x, y, largura, altura), um índice por janela
+        self._xs = array("i")
+        self._ys = array("i")
+        self._ws = array("i")
+        self._hs = array("i")
+        self._ids: List[int] = []  # índice -> window id (para o swap-pop na remoção)
+        self._id_to_idx: Dict[int, int] = {}
         self.snap_threshold = 20
 
+    def _append(self, wid, x, y, w, h) -> int:
+        idx = self._id_to_idx[wid] = len(self._ids)
+        self._ids.append(wid)
+        self._xs.append(x)
+        self._ys.append(y)
+        self._ws.append(w)
+        self._hs.append(h)
+        return idx
+
     def apply(self, windows, screen_geom):
+        xs, ys, ws, hs = self._xs, self._ys, self._ws, self._hs
+        id_to_idx = self._id_to_idx
         for w in windows:
             try:
                 wid = getattr(w, "id", None)
-                if wid not in self.positions:
-                    self.positions[wid] = {
-                        "x": screen_geom.x + 50,
-                        "y": screen_geom.y + 50,
-                        "width": max(MIN_W, screen_geom.width // 2),
-                        "height": max(MIN_H, screen_geom.height // 2),
-                    }
-                geom = self.positions[wid]
-                geom = self._snap_to_edges(geom, screen_geom)
-                w.configure(
-                    x=geom["x"],
-                    y=geom["y"],
-                    width=geom["width"],
-                    height=geom["height"],
-                )
+                idx = id_to_idx.get(wid)
+                if idx is None:
+                    idx = self._append(
+                        wid,
+                        screen_geom.x + 50,
+                        screen_geom.y + 50,
+                        max(MIN_W, screen_geom.width // 2),
+                        max(MIN_H, screen_geom.height // 2),
+                    )
+                x, y, width, height = self._snap_to_edges((xs[idx], ys[idx], ws[idx], hs[idx]), screen_geom)
+                xs[idx] = x
+                ys[idx] = y
+                self._configure(w, x, y, width, height)
                 try:
                     w.map()
                 except Exception:
@@ -130,40 +171,58 @@ class Floating(BaseLayout):
                 logger.exception("Floating.apply falhou para %s", getattr(w, "id", w))
 
     def _snap_to_edges(self, geom, screen_geom):
-        if abs(geom["x"] - screen_geom.x) < self.snap_threshold:
-            geom["x"] = screen_geom.x
-        if abs((geom["x"] + geom["width"]) - (screen_geom.x + screen_geom.width)) < self.snap_threshold:
-            geom["x"] = screen_geom.x + screen_geom.width - geom["width"]
-        if abs(geom["y"] - screen_geom.y) < self.snap_threshold:
-            geom["y"] = screen_geom.y
-        if abs((geom["y"] + geom["height"]) - (screen_geom.y + screen_geom.height)) < self.snap_threshold:
-            geom["y"] = screen_geom.y + screen_geom.height - geom["height"]
-        return geom
+        x, y, w, h = geom
+        t = self.snap_threshold
+        sx = screen_geom.x
+        sy = screen_geom.y
+        right = sx + screen_geom.width
+        bottom = sy + screen_geom.height
+        if -t < x - sx < t:
+            x = sx
+        if -t < x + w - right < t:
+            x = right - w
+        if -t < y - sy < t:
+            y = sy
+        if -t < y + h - bottom < t:
+            y = bottom - h
+        return (x, y, w, h)
 
     def move(self, win, dx, dy):
-        wid = getattr(win, "id", None)
-        if wid in self.positions:
-            self.positions[wid]["x"] += dx
-            self.positions[wid]["y"] += dy
+        idx = self._id_to_idx.get(getattr(win, "id", None))
+        if idx is not None:
+            self._xs[idx] += dx
+            self._ys[idx] += dy
 
     def resize(self, win, dw, dh):
-        wid = getattr(win, "id", None)
-        if wid in self.positions:
-            self.positions[wid]["width"] = max(MIN_W, self.positions[wid]["width"] + dw)
-            self.positions[wid]["height"] = max(MIN_H, self.positions[wid]["height"] + dh)
+        idx = self._id_to_idx.get(getattr(win, "id", None))
+        if idx is not None:
+            self._ws[idx] = max(MIN_W, self._ws[idx] + dw)
+            self._hs[idx] = max(MIN_H, self._hs[idx] + dh)
 
     def on_window_add(self, win):
         wid = getattr(win, "id", None)
-        if wid not in self.positions:
-            self.positions[wid] = {"x": 50, "y": 50, "width": 400, "height": 300}
+        if wid not in self._id_to_idx:
+            self._append(wid, 50, 50, 400, 300)
 
     def on_window_remove(self, win):
-        wid = getattr(win, "id", None)
-        if wid in self.positions:
-            del self.positions[wid]
+        super().on_window_remove(win)
+        idx = self._id_to_idx.pop(getattr(win, "id", None), None)
+        if idx is None:
+            return
+        # swap-pop: a última janela ocupa o lugar da removida, arrays continuam compactos
+        last = len(self._ids) - 1
+        if idx != last:
+            moved = self._ids[idx] = self._ids[last]
+            self._id_to_idx[moved] = idx
+            for col in (self._xs, self._ys, self._ws, self._hs):
+                col[idx] = col[last]
+        self._ids.pop()
+        for col in (self._xs, self._ys, self._ws, self._hs):
+            col.pop()
 
 
 class BSP(BaseLayout):
+    __slots__ = ()
     name = "bsp"
     is_floating = False
 
@@ -193,6 +252,7 @@ class BSP(BaseLayout):
 
 
 class Grid(BaseLayout):
+    __slots__ = ()
     name = "grid"
     is_floating = False
 
@@ -225,10 +285,12 @@ class Grid(BaseLayout):
 
 
 class Tabbed(BaseLayout):
+    __slots__ = ("current_tab",)
     name = "tabbed"
     is_floating = False
 
     def __init__(self):
+        super().__init__()
         self.current_tab = 0
 
     def apply(self, windows, screen_geom):
@@ -265,10 +327,12 @@ class Tabbed(BaseLayout):
 
 
 class Stacking(BaseLayout):
+    __slots__ = ("current",)
     name = "stacking"
     is_floating = False
 
     def __init__(self):
+        super().__init__()
         self.current = 0
 
     def apply(self, windows, screen_geom):
@@ -303,48 +367,73 @@ class Stacking(BaseLayout):
 class LayoutManager:
     """Gerenciador de layouts — orquestra qual layout aplicar."""
 
+    __slots__ = ("layouts", "current", "_instances", "_current_layout")
+
     def __init__(self):
-        self.layouts = [
-            Monocle(),
-            Fullscreen(),
-            Floating(),
-            BSP(),
-            Grid(),
-            Tabbed(),
-            Stacking(),
-        ]
+        # classes, não instâncias: cada layout só é criado na primeira vez que é usado
+        self.layouts = (
+            Monocle,
+            Fullscreen,
+            Floating,
+            BSP,
+            Grid,
+            Tabbed,
+            Stacking,
+        )
+        self._instances: Dict[int, BaseLayout] = {}
         self.current = 0
+        self._current_layout = self._get(0)
+
+    def _get(self, idx: int) -> BaseLayout:
+        inst = self._instances.get(idx)
+        if inst is None:
+            inst = self._instances[idx] = self.layouts[idx]()
+        return inst
+
+    def _select(self, idx: int):
+        if idx != self.current:
+            # as janelas foram posicionadas pelo layout anterior
+            self._get(idx).reset_cache()
+        self.current = idx
+        self._current_layout = self._get(idx)
+
+    def forget_geometry(self, win: Any):
+        """
+        Descarta a geometria em cache de win em todos os layouts já criados.
+        Chamar quando a janela é desmapeada, vira flutuante ou é movida fora do layout.
+        """
+        for inst in self._instances.values():
+            inst.forget_geometry(win)
 
     def next_layout(self):
-        self.current = (self.current + 1) % len(self.layouts)
+        self._select((self.current + 1) % len(self.layouts))
 
     def prev_layout(self):
-        self.current = (self.current - 1) % len(self.layouts)
+        self._select((self.current - 1) % len(self.layouts))
 
     def set_layout(self, idx: int):
         if 0 <= idx < len(self.layouts):
-            self.current = idx
+            self._select(idx)
 
     def apply(self, windows: List[Any], screen_geom: Any) -> None:
         if not windows:
             return
         try:
-            layout = self.layouts[self.current]
-            layout.apply(windows, screen_geom)
+            self._current_layout.apply(windows, screen_geom)
         except Exception:
             logger.exception("LayoutManager.apply falhou")
 
     def current_name(self) -> str:
-        return getattr(self.layouts[self.current], "name", "unknown")
+        return getattr(self._current_layout, "name", "unknown")
 
     def add_window(self, win: Any):
         try:
-            self.layouts[self.current].on_window_add(win)
+            self._current_layout.on_window_add(win)
         except Exception:
             logger.exception("add_window hook falhou")
 
     def remove_window(self, win: Any):
         try:
-            self.layouts[self.current].on_window_remove(win)
+            self._current_layout.on_window_remove(win)
         except Exception:
             logger.exception("remove_window hook falhou")
@@ -84,6 +84,11 @@ class WMContext:
         self.statusbar = None
 
     # small convenience hooks used by EWMH manager if present
+    def forget_geometry(self, win):
+        """Janela movida/desmapeada fora do layout: descarta a geometria em cache dela."""
+        if self.layout_manager:
+            self.layout_manager.forget_geometry(win)
+
     def focus_window_by_wid(self, wid):
         try:
             if not self.window_manager:
@@ -116,6 +121,8 @@ class WMContext:
                     LOG.exception("Falha ao ocultar statusbar")
                 # expand window to monitor geometry (best-effort)
                 try:
+                    # geometria definida fora do layout: ele não pode confiar no cache
+                    self.forget_geometry(win)
                     # find monitor geometry (if multimonitor available)
                     if self.multimonitor and hasattr(self.multimonitor, "monitor_for_window"):
                         mon = self.multimonitor.monitor_for_window(win)
@@ -180,6 +187,10 @@ def handle_map_request(wm: WMContext, ev: event.MapRequest):
     try:
         xwin = ev.window
         LOG.info("MapRequest: %s", getattr(xwin, "id", xwin))
+        # MapRequest só vem do cliente (o map do próprio WM não é redirecionado):
+        # o _NET_WM_STATE em cache pode ter mudado enquanto a janela estava retirada
+        if wm.ewmh:
+            wm.ewmh.forget_window(xwin.id)
         if wm.window_manager:
             mw = wm.window_manager.manage(xwin)
             # If rules say it should be floating, toggle
@@ -200,6 +211,8 @@ def handle_destroy_notify(wm: WMContext, ev: event.DestroyNotify):
     try:
         xwin = ev.window
         LOG.info("DestroyNotify: %s", getattr(xwin, "id", xwin))
+        if wm.ewmh:
+            wm.ewmh.forget_window(xwin.id)
         if wm.window_manager and hasattr(wm.window_manager, "find_by_xwin"):
             mw = wm.window_manager.find_by_xwin(xwin)
             if mw:
@@ -287,6 +300,9 @@ def handle_button_release(wm: WMContext, ev: event.ButtonRelease):
 
 def handle_property_notify(wm: WMContext, ev: event.PropertyNotify):
     try:
+        # _NET_WM_STATE em cache no EWMH deixa de valer
+        if wm.ewmh:
+            wm.ewmh.on_property_notify(ev)
         # if active window name changed, update decorations / statusbar
         atom_name = None
         try:
@@ -513,6 +529,11 @@ def main():
             else:
                 # ignore other events or add handlers as needed
                 pass
+            # um único flush quando a fila esvazia, antes de bloquear em next_event
+            if not wm.dpy.pending_events():
+                # o EWMH faz o flush se escreveu algo; senão, flush direto
+                if not (wm.ewmh and wm.ewmh.flush_if_pending()):
+                    wm.dpy.flush()
         except KeyboardInterrupt:
             LOG.info("KeyboardInterrupt recebido, saindo...")
             break
@@ -537,6 +558,11 @@ def main():
                 LOG.debug("Falha ao parar statusbar")
     except Exception:
         pass
+    try:
+        if wm.ewmh:
+            wm.ewmh.shutdown()
+    except Exception:
+        LOG.debug("Falha no shutdown do EWMH")
     try:
         wm.dpy.flush()
         wm.dpy.close()
@@ -29,6 +29,7 @@ class FloatingManager:
     def toggle_floating(self, win):
         """Alterna janela entre tiling e floating."""
         wid = win.id
+        self.wm.forget_geometry(win)
         if wid in self.floating_windows:
             self.floating_windows.pop(wid, None)
             self.wm.layouts.apply_layout()
@@ -51,6 +52,7 @@ class FloatingManager:
         wid = win.id
         geom = win.get_geometry()
         scr_w, scr_h = self.screen.width_in_pixels, self.screen.height_in_pixels
+        self.wm.forget_geometry(win)
 
         if wid in self.floating_windows and self.floating_windows[wid]["fullscreen"]:
             # sair do fullscreen → restaurar
@@ -105,6 +107,7 @@ class FloatingManager:
         action, win, geom, start = self.dragging
         dx = ev.root_x - start[0]
         dy = ev.root_y - start[1]
+        self.wm.forget_geometry(win)
 
         if action == "move":
             new_x, new_y = geom.x + dx, geom.y + dy
@@ -129,6 +132,7 @@ class FloatingManager:
         new_x, new_y = geom.x + dx, geom.y + dy
         new_x, new_y = self._apply_snap(new_x, new_y, geom.width, geom.height)
         win.configure(x=new_x, y=new_y)
+        self.wm.forget_geometry(win)
         self._raise(win)
         self.dpy.flush()
 
@@ -137,6 +141,7 @@ class FloatingManager:
         geom = win.get_geometry()
         new_w, new_h = max(geom.width + dw, 50), max(geom.height + dh, 50)
         win.configure(width=new_w, height=new_h)
+        self.wm.forget_geometry(win)
         self._raise(win)
         self.dpy.flush()
 
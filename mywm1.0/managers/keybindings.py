@@ -20,6 +20,34 @@ logger.addHandler(logging.NullHandler())
 
 KeyAction = Callable[..., None]
 
+# NumLock (Mod2) e CapsLock (Lock) não mudam o atalho: cada binding é
+# registrado com essas quatro variantes, em vez de X.AnyModifier
+_LOCK_VARIANTS = (0, X.LockMask, X.Mod2Mask, X.LockMask | X.Mod2Mask)
+
+# geralmente queremos só Mod1/Mod4/Control/Shift
+_RELEVANT_MASK = X.Mod1Mask | X.Mod4Mask | X.ControlMask | X.ShiftMask
+
+# Nome de modificador (minúsculo) -> máscara do X
+_MOD_MASKS = {
+    "mod4": X.Mod4Mask,
+    "super": X.Mod4Mask,
+    "mod1": X.Mod1Mask,
+    "alt": X.Mod1Mask,
+    "control": X.ControlMask,
+    "shift": X.ShiftMask,
+}
+
+
+def _grab(root, keycode: int, mask: int):
+    for lock in _LOCK_VARIANTS:
+        root.grab_key(keycode, mask | lock, True, X.GrabModeAsync, X.GrabModeAsync)
+
+
+def _ungrab(root, keycode: int, mask: int):
+    for lock in _LOCK_VARIANTS:
+        root.ungrab_key(keycode, mask | lock)
+
+
 class KeyBindings:
     def __init__(self, wm, config: Optional[Dict] = None):
         """
@@ -38,16 +66,22 @@ class KeyBindings:
         self.config = config or {}
         # Mapping: (keycode, modifiers_mask) -> action function
         self._bindings: Dict[Tuple[int, int], KeyAction] = {}
+        # keysym (string do config) -> keycode, resolvido uma vez por mapeamento de teclado
+        self._keycodes: Dict[str, int] = {}
         # A máscara de modificador padrão (ex: Mod4)
         self.default_mod = self._parse_modifiers(self.config.get("modifier_mask", None)) or X.Mod4Mask
 
     def _keysym_to_keycode(self, keysym_str: str) -> Optional[int]:
+        keycode = self._keycodes.get(keysym_str)
+        if keycode is not None:
+            return keycode
         try:
             sym = XK.string_to_keysym(keysym_str)
             if sym == 0:
                 logger.warning("keysym desconhecido: %s", keysym_str)
                 return None
-            return self.wm.dpy.keysym_to_keycode(sym)
+            keycode = self._keycodes[keysym_str] = self.wm.dpy.keysym_to_keycode(sym)
+            return keycode
         except Exception:
             logger.exception("Falha convertendo keysym %s para keycode", keysym_str)
             return None
@@ -60,17 +94,11 @@ class KeyBindings:
         mask = 0
         if modifiers_list:
             for m in modifiers_list:
-                m = m.lower()
-                if m in ("mod4", "super"):
-                    mask |= X.Mod4Mask
-                elif m in ("mod1", "alt"):
-                    mask |= X.Mod1Mask
-                elif m == "control":
-                    mask |= X.ControlMask
-                elif m == "shift":
-                    mask |= X.ShiftMask
-                else:
+                bit = _MOD_MASKS.get(m.lower())
+                if bit is None:
                     logger.warning("modificador desconhecido em keybindings config: %s", m)
+                else:
+                    mask |= bit
         return mask
 
     def load_from_config(self, config: Dict):
@@ -79,6 +107,8 @@ class KeyBindings:
         Reseta binds existentes (desfaz grabs) e registra novos.
         """
         self.ungrab_all_keys()
+        self._bindings.clear()
+        self._keycodes.clear()
         self.config = config or {}
         self.default_mod = self._parse_modifiers(self.config.get("modifier_mask", None)) or self.default_mod
 
@@ -105,8 +135,7 @@ class KeyBindings:
         dpy = self.wm.dpy
         for (keycode, mask), action in self._bindings.items():
             try:
-                root.grab_key(keycode, mask, True, X.GrabModeAsync, X.GrabModeAsync)
-                # Também querer suportar combinações com NumLock, CapsLock etc. pode exigir grab adicional
+                _grab(root, keycode, mask)
             except Exception as e:
                 logger.exception("Falha ao grab key %s modifiers %s: %s", keycode, mask, e)
         try:
@@ -122,7 +151,7 @@ class KeyBindings:
         dpy = self.wm.dpy
         for (keycode, mask) in list(self._bindings.keys()):
             try:
-                root.ungrab_key(keycode, mask)
+                _ungrab(root, keycode, mask)
             except Exception:
                 logger.debug("Falha ungrab key %s modifiers %s", keycode, mask)
         try:
@@ -136,7 +165,7 @@ class KeyBindings:
         Se a combinação corresponder, executa a ação associada.
         """
         keycode = ev.detail
-        state = ev.state & self._relevant_modifier_mask()
+        state = ev.state & _RELEVANT_MASK
         action = self._bindings.get((keycode, state))
         if action:
             try:
@@ -153,8 +182,7 @@ class KeyBindings:
         Mascara de modificadores que consideramos relevantes para comparar (ex: ignorar Num Lock etc.)
         Pode ser configurável se quiser.
         """
-        # geralmente queremos só Mod1/Mod4/Control/Shift
-        return X.Mod1Mask | X.Mod4Mask | X.ControlMask | X.ShiftMask
+        return _RELEVANT_MASK
 
     def add_binding(self, keysym: str, modifiers: List[str], action: KeyAction):
         """
@@ -166,7 +194,7 @@ class KeyBindings:
         mask = self._parse_modifiers(modifiers) or self.default_mod
         self._bindings[(keycode, mask)] = action
         try:
-            self.wm.root.grab_key(keycode, mask, True, X.GrabModeAsync, X.GrabModeAsync)
+            _grab(self.wm.root, keycode, mask)
             self.wm.dpy.flush()
         except Exception:
             logger.exception("Falha grab key dinâmica %s %s", keycode, mask)
@@ -183,7 +211,7 @@ class KeyBindings:
         key = (keycode, mask)
         if key in self._bindings:
             try:
-                self.wm.root.ungrab_key(keycode, mask)
+                _ungrab(self.wm.root, keycode, mask)
             except Exception:
                 logger.debug("Falha ungrab key dinâmica %s %s", keycode, mask)
             del self._bindings[key]
@@ -201,6 +201,7 @@ class MultiMonitorManager:
 
         try:
             win.configure(x=new_x, y=new_y)
+            self.wm.forget_geometry(win)
             self.wm.dpy.flush()
         except Exception:
             logger.exception("Falha movendo janela %s para monitor %s", getattr(win, "id", win), target)
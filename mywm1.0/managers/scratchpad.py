@@ -76,6 +76,7 @@ class ScratchpadManager:
             return
         try:
             inst["win"].unmap()
+            self.wm.forget_geometry(inst["win"])
             self.wm.dpy.flush()
             inst["visible"] = False
             self._run_hooks("on_hide", name, inst["win"])
@@ -87,6 +88,7 @@ class ScratchpadManager:
         if inst and inst.get("win"):
             try:
                 inst["win"].configure(x=x, y=y)
+                self.wm.forget_geometry(inst["win"])
                 self.wm.dpy.flush()
                 inst["position"] = {"x": x, "y": y}
             except Exception:
@@ -97,6 +99,7 @@ class ScratchpadManager:
         if inst and inst.get("win"):
             try:
                 inst["win"].configure(width=w, height=h)
+                self.wm.forget_geometry(inst["win"])
                 self.wm.dpy.flush()
                 inst["geometry"] = {"width": w, "height": h}
             except Exception:
@@ -178,6 +181,7 @@ class ScratchpadManager:
                 height=geom.get("height", 600),
                 border_width=getattr(self.wm.decorations, "border_width", 0),
             )
+            self.wm.forget_geometry(inst["win"])
             self.wm.dpy.flush()
         except Exception:
             logger.exception("Erro aplicando geometria ao scratchpad %s", name)
@@ -196,6 +200,7 @@ class ScratchpadManager:
             else:
                 x, y = pos.get("x", 100), pos.get("y", 100)
             inst["win"].configure(x=x, y=y)
+            self.wm.forget_geometry(inst["win"])
             self.wm.dpy.flush()
         except Exception:
             logger.exception("Erro aplicando posição ao scratchpad %s", name)
@@ -9,6 +9,7 @@ Requisitos esperados no `wm`:
 - wm.dpy: Display
 - wm.root: root window
 - wm.layout_manager: layout manager com método apply(windows, screen_geom)
+- wm.forget_geometry(win): descarta a geometria em cache da janela nos layouts
 - wm.decorations: manager com apply_decorations()
 - wm.ewmh: manager EWMH compatível com a interface usada abaixo (set_active_window, set_fullscreen, set_maximized)
 
@@ -18,6 +19,7 @@ Nota: adapte nomes/assinaturas conforme seus managers já evoluídos.
 from typing import Any, Dict, List, Optional, Tuple, Callable
 import logging
 import time
+from array import array
 
 from Xlib import X
 from Xlib.error import BadWindow
@@ -86,6 +88,8 @@ class WindowManager:
         self.ewmh = getattr(wm, "ewmh", None)
 
         self.managed: List[ManagedWindow] = []
+        # ids das janelas gerenciadas, na mesma ordem de self.managed: vai direto para _NET_CLIENT_LIST
+        self._window_ids = array("I")
         self.focus: Optional[ManagedWindow] = None
         self._recently_closed: Optional[ManagedWindow] = None
 
@@ -108,9 +112,9 @@ class WindowManager:
         if xwin is None:
             return None
         # se já gerenciada, só retorna o wrapper existente
-        for mw in self.managed:
-            if mw.id == getattr(xwin, "id", None):
-                return mw
+        wid = getattr(xwin, "id", None)
+        if wid is not None and wid in self._window_ids:
+            return self.managed[self._window_ids.index(wid)]
         try:
             mw = ManagedWindow(xwin, rules=rules)
             # aplicar regra 'float' se informada
@@ -118,13 +122,18 @@ class WindowManager:
             # tentar atualizar geometria
             mw.update_geometry_from_x()
             self.managed.append(mw)
+            self._window_ids.append(mw.id)
             logger.info("manage: adicionada janela %s", mw.id)
             # notificar EWMH / client list
             try:
                 if self.ewmh:
-                    self.ewmh.update_client_list([m.window for m in self.managed])
+                    # janela nova vai para o fim da lista: append em vez de reescrever tudo
+                    self.ewmh.add_client(mw.window)
+                    # _NET_WM_STATE já pedido (sem esperar): o primeiro toggle de
+                    # fullscreen/maximize usa o cache em vez de um round trip
+                    self.ewmh.request_state(mw.window)
             except Exception:
-                logger.exception("EWMH update_client_list falhou em manage")
+                logger.exception("EWMH add_client falhou em manage")
             # aplicar layout e decorações
             self.apply_layouts()
             if self.on_manage:
@@ -142,14 +151,20 @@ class WindowManager:
         if mw not in self.managed:
             return
         try:
-            self.managed.remove(mw)
+            i = self.managed.index(mw)
+            del self.managed[i]
+            del self._window_ids[i]
             logger.info("unmanage: removida janela %s", mw.id)
             self._recently_closed = mw
             if self.ewmh:
                 try:
-                    self.ewmh.update_client_list([m.window for m in self.managed])
+                    self.ewmh.remove_client(mw.window)
                 except Exception:
-                    logger.exception("EWMH update_client_list falhou em unmanage")
+                    logger.exception("EWMH remove_client falhou em unmanage")
+            if self.layout_manager:
+                # layouts esquecem a geometria em cache da janela
+                self.layout_manager.remove_window(mw.window)
+                self.layout_manager.forget_geometry(mw.window)
             self.apply_layouts()
             if self.on_unmanage:
                 try:
@@ -272,6 +287,7 @@ class WindowManager:
         if mw is None:
             return
         mw.floating = bool(floating)
+        self.wm.forget_geometry(mw.window)
         self.apply_layouts()
 
     def move_floating(self, mw: ManagedWindow, dx: int, dy: int):
@@ -280,6 +296,7 @@ class WindowManager:
             return
         if not mw.floating:
             mw.floating = True
+        self.wm.forget_geometry(mw.window)
         if not mw.update_geometry_from_x():
             return
         g = mw.cached_geom
@@ -303,6 +320,7 @@ class WindowManager:
             return
         if not mw.floating:
             mw.floating = True
+        self.wm.forget_geometry(mw.window)
         if not mw.update_geometry_from_x():
             return
         g = mw.cached_geom
@@ -347,6 +365,7 @@ class WindowManager:
             return
         mw = self._drag_state["mw"]
         mode = self._drag_state["mode"]
+        self.wm.forget_geometry(mw.window)
         sx, sy = self._drag_state["start_pointer"]
         sg = self._drag_state["start_geom"]
         dx = pointer_x - sx
@@ -428,6 +447,7 @@ class WindowManager:
         try:
             mw.window.unmap()
             mw.visible = False
+            self.wm.forget_geometry(mw.window)
             self.dpy.flush()
             if self.decorations:
                 self.decorations.apply_decorations()
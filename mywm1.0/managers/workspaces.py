@@ -20,6 +20,7 @@ Expectativa sobre `wm`:
 """
 
 from typing import Any, Dict, List, Optional, Callable, Tuple
+import contextlib
 import os
 import json
 import subprocess
@@ -173,26 +174,29 @@ class WorkspaceManager:
             e = getattr(self.wm, "ewmh", None)
             if not e:
                 return
-            # number of desktops
-            try:
-                if hasattr(e, "set_number_of_desktops"):
-                    e.set_number_of_desktops(len(self.workspaces))
-            except Exception:
-                logger.debug("ewmh.set_number_of_desktops falhou")
-            # desktop names
-            try:
-                if hasattr(e, "set_desktop_names"):
-                    e.set_desktop_names([ws.name for ws in self.workspaces])
-            except Exception:
-                logger.debug("ewmh.set_desktop_names falhou")
-            # set current desktop per primary monitor (EWMH supports a single current desktop)
-            try:
-                primary_mon = 0
-                cur = self.monitors_active.get(primary_mon, 0)
-                if hasattr(e, "set_current_desktop"):
-                    e.set_current_desktop(cur)
-            except Exception:
-                logger.debug("ewmh.set_current_desktop falhou")
+            # três propriedades seguidas: um único flush no fim
+            batch = e.batch() if hasattr(e, "batch") else contextlib.nullcontext()
+            with batch:
+                # number of desktops
+                try:
+                    if hasattr(e, "set_number_of_desktops"):
+                        e.set_number_of_desktops(len(self.workspaces))
+                except Exception:
+                    logger.debug("ewmh.set_number_of_desktops falhou")
+                # desktop names
+                try:
+                    if hasattr(e, "set_desktop_names"):
+                        e.set_desktop_names([ws.name for ws in self.workspaces])
+                except Exception:
+                    logger.debug("ewmh.set_desktop_names falhou")
+                # set current desktop per primary monitor (EWMH supports a single current desktop)
+                try:
+                    primary_mon = 0
+                    cur = self.monitors_active.get(primary_mon, 0)
+                    if hasattr(e, "set_current_desktop"):
+                        e.set_current_desktop(cur)
+                except Exception:
+                    logger.debug("ewmh.set_current_desktop falhou")
         except Exception:
             logger.exception("Erro atualizando EWMH globalmente")
 
@@ -389,6 +393,9 @@ class WorkspaceManager:
                 except Exception:
                     attrs = None
                 is_viewable = getattr(attrs, "map_state", None) == X.IsViewable if attrs else False
+                # map/unmap por fora do layout: ele volta a configurar a janela no próximo apply
+                if (wid in visible) != is_viewable:
+                    self.wm.forget_geometry(win)
                 if wid in visible:
                     if not is_viewable and raise_windows:
                         try:
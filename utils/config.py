@@ -4,6 +4,9 @@ import os
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "../config/config.toml")
 data = {}
 
+# Pixels das bordas ("#RRGGBB" já convertido), recalculados a cada load
+border_pixels = {}
+
 def load_config():
     """Carrega o config.toml"""
     global data
@@ -13,6 +16,19 @@ def load_config():
     except Exception as e:
         print(f"Falha ao carregar config: {e}")
         data = {}
+    _build_border_pixels()
+
+def _build_border_pixels():
+    """Atualiza border_pixels no lugar, para quem já guardou a referência"""
+    pixels = {}
+    for role in ("outer_focus", "outer_normal", "inner_focus", "inner_normal"):
+        try:
+            pixels[role] = int(get_color("border_" + role)[1:], 16)
+        except ValueError:
+            print(f"Cor inválida para border_{role}")
+            pixels[role] = 0xFFFFFF
+    border_pixels.clear()
+    border_pixels.update(pixels)
 
 def reload_config():
     """Recarrega config e atualiza globalmente"""
@@ -1,8 +1,70 @@
-import subprocess
+import os
+import queue
+import shlex
+import threading
 from utils.config import get_config
 
 cfg = get_config()
 
+# =======================
+# Worker: spawns saem da thread de eventos do X
+# =======================
+_JOBS = queue.Queue()
+_pending = set()
+_lock = threading.Lock()
+_worker_thread = None
+_children = set()   # pids iniciados por spawn() ainda não coletados (só o worker mexe)
+REAP_INTERVAL = 1.0
+
+def _reap_children():
+    """Coleta filhos que já terminaram, sem bloquear; só os pids criados por spawn()"""
+    for pid in list(_children):
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            done = pid
+        if done:
+            _children.discard(pid)
+
+def _worker():
+    while True:
+        try:
+            # Com filhos vivos acorda de tempos em tempos para coletá-los
+            fn, args = _JOBS.get(timeout=REAP_INTERVAL if _children else None)
+        except queue.Empty:
+            _reap_children()
+            continue
+        with _lock:
+            _pending.discard((fn, args))
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"Falha ao executar tarefa do launcher: {e}")
+        _reap_children()
+
+def submit(fn, *args):
+    """Agenda fn(*args) no worker; tarefas idênticas ainda pendentes são descartadas"""
+    global _worker_thread
+    job = (fn, args)
+    with _lock:
+        if job in _pending:
+            return
+        _pending.add(job)
+        if _worker_thread is None:
+            _worker_thread = threading.Thread(target=_worker, daemon=True)
+            _worker_thread.start()
+    _JOBS.put(job)
+
+def spawn(argv):
+    """
+    Inicia um programa via posix_spawn, sem /bin/sh no meio.
+    O socket do X já é FD_CLOEXEC (setup_wm), então não vaza para o filho.
+    Deve rodar no worker (via submit): é ele que coleta o filho depois, sem zumbis.
+    """
+    pid = os.posix_spawnp(argv[0], argv, os.environ)
+    _children.add(pid)
+    return pid
+
 def open(cfg=None):
     """
     Abre um launcher mínimo estilo dmenu_run.
@@ -15,6 +77,6 @@ def open(cfg=None):
     dmenu_cmd = cfg.data.get("launcher", {}).get("command", "dmenu_run")
 
     try:
-        subprocess.Popen(dmenu_cmd, shell=True)
+        spawn(shlex.split(dmenu_cmd))
     except Exception as e:
         print(f"Falha ao abrir launcher: {e}")
@@ -0,0 +1,35 @@
+from Xlib import error
+
+# =======================
+# Tratamento de erros do X no estilo trap.call do xpra:
+# erros de corrida (janela já destruída etc.) são anotados, não propagados
+# =======================
+_last_error = None
+
+def _record(err, request):
+    global _last_error
+    _last_error = err
+
+def install(dpy):
+    """Instala o handler padrão: erros assíncronos só são registrados"""
+    dpy.set_error_handler(_record)
+
+def last_error():
+    """Último erro assíncrono recebido (ou None); zera o registro"""
+    global _last_error
+    err, _last_error = _last_error, None
+    return err
+
+def call_synced(fn, *args, **kwargs):
+    """Requisição com resposta (ex: get_geometry); retorna None se o X recusar"""
+    try:
+        return fn(*args, **kwargs)
+    except error.XError:
+        return None
+
+def call_unsynced(fn, *args, **kwargs):
+    """Requisição sem resposta, fire-and-forget; erros chegam ao handler padrão"""
+    try:
+        fn(*args, **kwargs)
+    except error.XError:
+        pass